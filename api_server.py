@@ -0,0 +1,288 @@
+"""
+Lightweight JSON HTTP API for voting and question submission.
+
+Serves the hot audience operations without a Streamlit script rerun, backed by a
+StateManager on the same SQLite file as the app, so it can run beside it (or as
+several processes) and be tried locally with nothing but the database file.
+
+Endpoints:
+    GET  /state?sections=active_question,votes&past_limit=3&since=REV&wait=SECONDS
+    GET  /has_voted?question_id=ID&attendee_id=ATTENDEE
+    GET  /metrics    Prometheus text, when PANEL_SHOWDOWN_METRICS=1 (see metrics.py)
+    POST /vote       {"question_id": ID, "team": "bc" | "fo", "attendee_id": ATTENDEE}
+    POST /questions  {"text": TEXT, "author": AUTHOR}
+
+/state answers 304 with no body when the revision is still `since` (also accepted as an
+If-None-Match header); with `wait` it first blocks up to that many seconds for a change.
+
+Every endpoint except /metrics takes an optional `event` query parameter (default "default")
+naming an existing event; unknown events answer 404.
+
+Examples:
+    python api_server.py
+    python api_server.py --port 8502 --db panel_showdown.db --allow-origin http://localhost:8501
+    curl -X POST localhost:8502/vote -d '{"question_id": 1, "team": "bc", "attendee_id": "abc"}'
+"""
+import argparse
+import json
+import math
+import sqlite3
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from database import DEFAULT_EVENT, STATE_SECTIONS
+from state_manager import StateManager
+
+VALID_TEAMS = ("bc", "fo")
+DEFAULT_STATE_SECTIONS = ["active_question", "votes", "display_settings"]
+MAX_BODY_BYTES = 16 * 1024
+MAX_WAIT_SECONDS = 30
+
+class ApiError(Exception):
+    """A request error reported to the client with its HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "PanelShowdownAPI/1.0"
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients don't reconnect for every vote
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes; don't let them wait on delayed ACKs
+
+    @property
+    def state_manager(self) -> StateManager:
+        return self.server.get_state_manager(self._event)
+
+    def do_GET(self):
+        self._dispatch({"/state": self._get_state, "/has_voted": self._has_voted, "/metrics": self._metrics})
+
+    def do_POST(self):
+        # Always consume the body first so a rejected request doesn't break the kept-alive connection
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # No way to tell where the body ends, so the connection can't be reused
+            self.close_connection = True
+            self._send_json({"error": "Content-Length must be a non-negative integer"}, HTTPStatus.BAD_REQUEST)
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json({"error": "Request body too large"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        self._body = self.rfile.read(length)
+        self._dispatch({"/vote": self._vote, "/questions": self._add_question})
+
+    def do_OPTIONS(self):
+        # CORS preflight for pages served from the Streamlit origin
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self._send_common_headers(0)
+        self.end_headers()
+
+    def _dispatch(self, routes: dict) -> None:
+        url = urlsplit(self.path)
+        route = routes.get(url.path)
+        try:
+            if route is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No such endpoint: {self.command} {url.path}")
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            self._event = params.get("event") or DEFAULT_EVENT
+            route(params)
+        except ApiError as e:
+            self._send_json({"error": str(e)}, e.status)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, HTTPStatus.BAD_REQUEST)
+        except sqlite3.Error as e:
+            print(f"Error handling {self.command} {url.path}: {e}")
+            self._send_json({"error": "Database error"}, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    # --- Endpoints ---
+
+    def _get_state(self, params: dict) -> None:
+        sections = params["sections"].split(",") if params.get("sections") else DEFAULT_STATE_SECTIONS
+        unknown = set(sections) - set(STATE_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown state sections: {', '.join(sorted(unknown))}")
+        options = {"sections": sections}
+        for name in ("questions_limit", "questions_after", "past_limit", "past_before"):
+            if params.get(name):
+                options[name] = _parse_int(params[name], name)
+
+        since = params.get("since") or self.headers.get("If-None-Match", "").strip('"') or None
+        since = _parse_int(since, "since") if since is not None else None
+        if since is not None and params.get("wait"):
+            wait = min(_parse_seconds(params["wait"], "wait"), MAX_WAIT_SECONDS)
+            self.state_manager.wait_for_change(since, wait)
+
+        state = self.state_manager.get_state_if_changed(since, **options)
+        if state is None:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", f'"{since}"')
+            self._send_common_headers(0)
+            self.end_headers()
+            return
+        self._send_json(state, etag=state["revision"])
+
+    def _metrics(self, params: dict) -> None:
+        if not metrics.is_enabled():
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Metrics are disabled; set {metrics.METRICS_ENV_VAR}=1 to enable them")
+        data = metrics.render_prometheus().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self._send_common_headers(len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _has_voted(self, params: dict) -> None:
+        question_id = _parse_int(_require(params, "question_id"), "question_id")
+        voted, team = self.state_manager.has_voted(question_id, _require(params, "attendee_id"))
+        self._send_json({"has_voted": voted, "team": team})
+
+    def _vote(self, params: dict) -> None:
+        body = self._read_json()
+        question_id = _parse_int(_require(body, "question_id"), "question_id")
+        team = _require(body, "team")
+        if team not in VALID_TEAMS:
+            raise ValueError(f"team must be one of: {', '.join(VALID_TEAMS)}")
+        recorded = self.state_manager.vote(question_id, team, str(_require(body, "attendee_id")))
+        self._send_json({"recorded": recorded})
+
+    def _add_question(self, params: dict) -> None:
+        body = self._read_json()
+        text = str(_require(body, "text")).strip()
+        author = str(_require(body, "author")).strip()
+        if not text or not author:
+            raise ValueError("text and author must not be empty")
+        question_id = self.state_manager.add_question(text, author)
+        self._send_json({"id": question_id}, HTTPStatus.CREATED)
+
+    # --- Helpers ---
+
+    def _read_json(self) -> dict:
+        try:
+            body = json.loads(self._body or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _send_json(self, payload, status: HTTPStatus = HTTPStatus.OK, etag: int | None = None) -> None:
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag is not None:
+            self.send_header("ETag", f'"{etag}"')
+        self._send_common_headers(len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_common_headers(self, content_length: int) -> None:
+        self.send_header("Content-Length", str(content_length))
+        self.send_header("Cache-Control", "no-store")
+        if self.server.allow_origin:
+            self.send_header("Access-Control-Allow-Origin", self.server.allow_origin)
+
+    def log_message(self, format, *args):
+        if self.server.log_requests:
+            super().log_message(format, *args)
+
+def _require(params: dict, name: str):
+    value = params.get(name)
+    if value is None or value == "":
+        raise ValueError(f"Missing {name}")
+    return value
+
+def _parse_int(value, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+
+def _parse_seconds(value, name: str) -> float:
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = math.nan
+    # float() also accepts "nan" and "inf", which would turn a wait into an endless loop
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f"{name} must be a non-negative number of seconds")
+    return seconds
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state_manager: StateManager, allow_origin: str | None, log_requests: bool):
+        super().__init__(address, ApiHandler)
+        self.state_manager = state_manager
+        self.allow_origin = allow_origin
+        self.log_requests = log_requests
+        self._state_managers = {state_manager.event: state_manager}
+        self._state_managers_lock = threading.Lock()
+
+    def get_state_manager(self, event: str) -> StateManager:
+        """The state manager for an existing event, created on first use like the default one."""
+        with self._state_managers_lock:
+            if event not in self._state_managers:
+                if event not in self.state_manager.list_events():
+                    raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown event: {event}")
+                self._state_managers[event] = StateManager(
+                    self.state_manager.db.db_file, event=event,
+                    batch_votes=self.state_manager.vote_writer is not None
+                )
+            return self._state_managers[event]
+
+    def server_close(self):
+        super().server_close()
+        with self._state_managers_lock:
+            # The caller owns the state manager it passed in
+            for event, state_manager in self._state_managers.items():
+                if state_manager is not self.state_manager:
+                    state_manager.cleanup()
+
+def make_server(state_manager: StateManager, host: str = "127.0.0.1", port: int = 8502,
+                allow_origin: str | None = None, log_requests: bool = False) -> ApiServer:
+    """
+    Create the API server (call serve_forever() on it to run).
+
+    Args:
+        state_manager: State manager of the default event; other events get their own on the same database
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+        allow_origin: Value for Access-Control-Allow-Origin, so browser pages on another origin can call the API
+        log_requests: Log every request to stderr
+    """
+    return ApiServer((host, port), state_manager, allow_origin, log_requests)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Panel Showdown JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8502, help="Port to listen on")
+    parser.add_argument("--db", default="panel_showdown.db", help="SQLite database shared with the app")
+    parser.add_argument("--allow-origin", help="Allow browser requests from this origin (e.g. the Streamlit app URL, or *)")
+    parser.add_argument("--no-batch-votes", action="store_true",
+                        help="Write each vote in its own transaction instead of through the batching writer")
+    parser.add_argument("--log-requests", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    metrics.install_from_env()
+    state_manager = StateManager(args.db, batch_votes=not args.no_batch_votes)
+    server = make_server(state_manager, args.host, args.port, args.allow_origin, args.log_requests)
+    print(f"Serving Panel Showdown API on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        state_manager.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import streamlit as st
+import metrics
+metrics.install_from_env()  # Must run before the views are imported so their renders get wrapped
+from database import DEFAULT_EVENT
 from state_manager import StateManager
 from utils.styles import inject_custom_css
 from views.audience_view import run_auto_refreshing_audience_view
@@ -14,11 +17,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # Default to expanded, we'll hide it in display view via CSS
 )
 
-# Initialize state manager
-state_manager = StateManager()
+MAX_EVENT_NAME_LENGTH = 64
 
-# Get the current view from URL parameters
+@st.cache_resource
+def get_state_manager(event: str = DEFAULT_EVENT) -> StateManager:
+    """Create one StateManager per event per process so every session of the event shares its connection pool."""
+    # Backups cover the whole database file, so only the default event's manager takes them
+    return StateManager(event=event, reconcile_interval=5.0,
+                        backup_interval=300 if event == DEFAULT_EVENT else None)
+
+# The default event's manager always exists, so backups run whichever events are in use
+default_state_manager = get_state_manager()
+
+# Get the current view and event from URL parameters
 view = st.query_params.get("view", "audience")
+event = st.query_params.get("event", DEFAULT_EVENT).strip() or DEFAULT_EVENT
 
 # Inject custom CSS
 inject_custom_css()
@@ -30,6 +43,9 @@ if view == "display":
             section[data-testid="stSidebar"] {display: none;}
             .stDeployButton {display: none;}
             footer {visibility: hidden;}
+            /* Live sections spend most of their time waiting for a change; don't fade them or show "Running" meanwhile */
+            [data-stale="true"] {opacity: 1 !important; transition: none !important;}
+            [data-testid="stStatusWidget"] {visibility: hidden;}
         </style>
     """, unsafe_allow_html=True)
 
@@ -38,6 +54,18 @@ if view not in ["audience", "moderator", "display"]:
     st.error("Invalid view specified")
     st.stop()
 
+if len(event) > MAX_EVENT_NAME_LENGTH:
+    st.error("Invalid event specified")
+    st.stop()
+
+# Only moderators start new events; the other views need it to exist already
+if (event != DEFAULT_EVENT and event not in default_state_manager.list_events()
+        and not (view == "moderator" and "moderator" in st.query_params.get("access", []))):
+    st.error(f"Unknown event: {event}")
+    st.stop()
+
+state_manager = get_state_manager(event)
+
 # Show appropriate view based on URL
 if view == "audience":
     run_auto_refreshing_audience_view(state_manager)
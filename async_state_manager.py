@@ -0,0 +1,237 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from change_notifier import ChangeEvent, check_timeout
+from database import POOL_SIZE, VOTE_RECORDED
+from state_manager import StateManager, state_options_key
+
+CALL_TIMEOUT_SECONDS = 30  # Default limit on any single call, including time queued for a worker
+CHANGE_WATCH_SLICE_SECONDS = 1.0  # How long the change watcher blocks before checking for waiters again
+
+class AsyncStateManager:
+    """
+    asyncio facade over a StateManager, for async servers that handle many clients
+    on one event loop.
+
+    Database work runs on a worker pool no larger than the connection pool, so a flood
+    of requests queues up instead of starting a thread each. Concurrent get_state calls
+    with the same options share one in-flight read. Any number of wait_for_change calls
+    share a single watcher thread.
+
+    Every call gives up after call_timeout seconds (raising asyncio.TimeoutError) and can
+    be cancelled. A cancelled or timed out read is dropped if it hasn't started yet. A
+    write that was already submitted still runs to completion, so after a timeout its
+    outcome is unknown rather than undone.
+
+    Use one instance per event loop. The caller owns the StateManager and cleans it up.
+    """
+
+    def __init__(self, state_manager: StateManager, max_workers: int = POOL_SIZE,
+                 call_timeout: float | None = CALL_TIMEOUT_SECONDS):
+        """
+        Args:
+            state_manager: State manager the calls are run against
+            max_workers: Threads running database work; more than the connection pool only adds waiting
+            call_timeout: Seconds before a call raises asyncio.TimeoutError (None waits forever)
+        """
+        self.state_manager = state_manager
+        self.call_timeout = call_timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="async-state")
+        self._watch_executor = ThreadPoolExecutor(1, thread_name_prefix="async-state-watch")
+        self._inflight_reads: dict[tuple, asyncio.Future] = {}  # get_state options key -> shared read
+        self._change_waiters: list[tuple[int, asyncio.Future]] = []  # (revision, waiter)
+        self._watcher: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "AsyncStateManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    # --- Reads ---
+
+    async def get_state(self, **options) -> dict:
+        """
+        Get the current state (see StateManager.get_state). Identical concurrent calls share
+        one read, and the returned dict is shared too, so it must not be modified.
+        """
+        key = state_options_key(options)
+        read = self._inflight_reads.get(key)
+        if read is None:
+            read = self._submit(functools.partial(self.state_manager.get_state, **options))
+            self._inflight_reads[key] = read
+            read.add_done_callback(lambda _: self._forget_read(key, read))
+        # Shielded, so one caller giving up doesn't cancel the read for the others
+        return await self._wait(asyncio.shield(read))
+
+    def _forget_read(self, key: tuple, read: asyncio.Future) -> None:
+        if self._inflight_reads.get(key) is read:
+            del self._inflight_reads[key]
+
+    async def get_state_if_changed(self, last_revision: int | None, **options) -> dict | None:
+        """Get the current state, or None if nothing changed since last_revision."""
+        state = await self.get_state(**options)
+        if last_revision is not None and state["revision"] == last_revision:
+            return None
+        return state
+
+    async def get_vote_series(self, question_id: int, **options) -> dict:
+        """Get how a question's votes arrived over time (see StateManager.get_vote_series)."""
+        return await self._read(functools.partial(self.state_manager.get_vote_series, question_id, **options))
+
+    async def get_revision(self) -> int:
+        """Get the current state revision."""
+        return await self._read(self.state_manager.get_revision)
+
+    async def has_voted(self, question_id: int, attendee_id: str) -> tuple[bool, str | None]:
+        """Check if an attendee has voted for a question. Returns (has_voted, team_voted_for)."""
+        return await self._read(self.state_manager.has_voted, question_id, attendee_id)
+
+    async def get_attendee_votes(self, attendee_id: str) -> dict[int, str]:
+        """Get every vote cast by an attendee, as a dict of question_id to team."""
+        return await self._read(self.state_manager.get_attendee_votes, attendee_id)
+
+    async def list_events(self) -> list[str]:
+        """Get the names of every event in the database."""
+        return await self._read(self.state_manager.list_events)
+
+    async def list_backups(self) -> list[str]:
+        """Snapshots in the backup directory, oldest first."""
+        return await self._read(self.state_manager.list_backups)
+
+    async def wait_for_change(self, revision: int | None, timeout: float) -> ChangeEvent | None:
+        """
+        Wait until the state moves past revision (see StateManager.wait_for_change), without
+        holding a worker thread. Returns None if timeout seconds pass first.
+        """
+        check_timeout(timeout)
+        notifier = self.state_manager.notifier
+        event = notifier.wait_for_change(revision, 0)  # Doesn't block: only checks what's already known
+        if event is not None:
+            return event
+        waiter = asyncio.get_running_loop().create_future()
+        self._change_waiters.append((-1 if revision is None else revision, waiter))
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.ensure_future(self._watch_changes())
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _watch_changes(self) -> None:
+        """Block one thread on the notifier while anyone is waiting, and wake the waiters it satisfies."""
+        notifier = self.state_manager.notifier
+        loop = asyncio.get_running_loop()
+        while True:
+            revisions = [revision for revision, waiter in self._change_waiters if not waiter.done()]
+            if not revisions:
+                break
+            # The oldest revision anyone waits on, so a change that landed before we got here still counts
+            await loop.run_in_executor(self._watch_executor, notifier.wait_for_change,
+                                       min(revisions), CHANGE_WATCH_SLICE_SECONDS)
+            still_waiting = []
+            for revision, waiter in self._change_waiters:
+                if waiter.done():
+                    continue  # Timed out or cancelled
+                event = notifier.wait_for_change(revision, 0)
+                if event is None:
+                    still_waiting.append((revision, waiter))
+                else:
+                    waiter.set_result(event)
+            self._change_waiters = still_waiting
+
+    # --- Writes ---
+
+    async def add_question(self, text: str, author: str) -> int:
+        """Add a new question and return its ID."""
+        return await self._write(self.state_manager.add_question, text, author)
+
+    async def set_active_question(self, question_id: int | None) -> None:
+        """Set the active question (None to clear)."""
+        await self._write(self.state_manager.set_active_question, question_id)
+
+    async def vote(self, question_id: int, team: str, attendee_id: str) -> bool:
+        """
+        Record a vote for a question. Returns True if the vote was recorded.
+        With batch_votes=True the vote goes straight to the vote writer and holds no worker thread.
+        """
+        if self.state_manager.vote_writer is None:
+            return await self._write(self.state_manager.vote, question_id, team, attendee_id)
+        submitted = asyncio.wrap_future(self.state_manager.submit_vote(question_id, team, attendee_id))
+        self._track_write(submitted)
+        return await self._wait(asyncio.shield(submitted)) == VOTE_RECORDED
+
+    async def remove_question(self, question_id: int) -> None:
+        """Remove a question from the queue."""
+        await self._write(self.state_manager.remove_question, question_id)
+
+    async def reset_votes(self) -> None:
+        """Reset all votes."""
+        await self._write(self.state_manager.reset_votes)
+
+    async def reset_questions(self) -> None:
+        """Reset all questions (both current and past) and their associated votes."""
+        await self._write(self.state_manager.reset_questions)
+
+    async def add_votes(self, question_id: int, team: str, amount: int) -> None:
+        """Add a specified number of votes to a question and update team score."""
+        await self._write(self.state_manager.add_votes, question_id, team, amount)
+
+    async def subtract_votes(self, question_id: int, team: str, amount: int) -> None:
+        """Subtract a specified number of votes from a question and update team score."""
+        await self._write(self.state_manager.subtract_votes, question_id, team, amount)
+
+    async def load_initial_questions(self, json_file: str, **options) -> int:
+        """Load questions from a question bank (see StateManager.load_initial_questions). Returns the number imported."""
+        return await self._write(self.state_manager.load_initial_questions, json_file, **options)
+
+    async def toggle_scores_blur(self) -> bool:
+        """Toggle the blur state of scores and return the new state."""
+        return await self._write(self.state_manager.toggle_scores_blur)
+
+    async def set_question_winner(self, question_id: int, team: str) -> None:
+        """Set the winner for a question and update team scores."""
+        await self._write(self.state_manager.set_question_winner, question_id, team)
+
+    async def backup(self) -> str:
+        """Snapshot the database into the backup directory. Returns the snapshot path."""
+        return await self._write(self.state_manager.backup)
+
+    async def restore(self, snapshot_path: str) -> None:
+        """Atomically replace the database with a snapshot and refresh every view."""
+        await self._write(self.state_manager.restore, snapshot_path)
+
+    # --- Plumbing ---
+
+    def _submit(self, func: Callable, *args) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _wait(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.call_timeout)
+
+    async def _read(self, func: Callable, *args):
+        # Not shielded: giving up on a read that hasn't started yet frees its place in the queue
+        return await self._wait(self._submit(func, *args))
+
+    async def _write(self, func: Callable, *args, **kwargs):
+        write = self._submit(functools.partial(func, *args, **kwargs))
+        self._track_write(write)
+        # Shielded: once submitted, a write runs to completion even if the caller stops waiting
+        return await self._wait(asyncio.shield(write))
+
+    def _track_write(self, write: asyncio.Future) -> None:
+        # Reads started before a write finished mustn't be shared with callers that come after it
+        write.add_done_callback(lambda _: self._inflight_reads.clear())
+
+    async def close(self) -> None:
+        """Stop the worker threads, letting submitted work finish. Doesn't clean up the StateManager."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+        for _, waiter in self._change_waiters:
+            waiter.cancel()
+        self._change_waiters = []
+        loop = asyncio.get_running_loop()
+        for executor in (self._executor, self._watch_executor):
+            await loop.run_in_executor(None, executor.shutdown)
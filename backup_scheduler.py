@@ -0,0 +1,70 @@
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from storage import StorageBackend
+
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 12  # Snapshots kept per database; older ones are deleted
+BACKUP_SUFFIX = ".db"
+
+def backup_path(db: StorageBackend, directory: str = BACKUP_DIR) -> str:
+    """Path for a new snapshot of db: <directory>/<db name>-<timestamp>.db"""
+    name = os.path.splitext(os.path.basename(db.db_file))[0]
+    return os.path.join(directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{BACKUP_SUFFIX}")
+
+def list_backups(db: StorageBackend, directory: str = BACKUP_DIR) -> List[str]:
+    """Snapshots of db in directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    prefix = os.path.splitext(os.path.basename(db.db_file))[0] + "-"
+    return sorted(
+        os.path.join(directory, file_name)
+        for file_name in os.listdir(directory)
+        if file_name.startswith(prefix) and file_name.endswith(BACKUP_SUFFIX)
+    )
+
+def create_backup(db: StorageBackend, directory: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> str:
+    """Take a snapshot of db into directory and delete all but the newest keep snapshots."""
+    os.makedirs(directory, exist_ok=True)
+    path = db.backup(backup_path(db, directory))
+    for old_path in list_backups(db, directory)[:-keep]:
+        os.remove(old_path)
+    return path
+
+class BackupScheduler:
+    """Background thread that snapshots the database on an interval, keeping the newest few."""
+
+    def __init__(self, db: StorageBackend, interval_seconds: float, directory: str = BACKUP_DIR,
+                 keep: int = BACKUP_KEEP):
+        """
+        Args:
+            db: StorageBackend to back up
+            interval_seconds: Pause between snapshots
+            directory: Where snapshots are written
+            keep: Number of snapshots to keep
+        """
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.directory = directory
+        self.keep = keep
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> str:
+        """Take a snapshot now. Returns its path."""
+        return create_backup(self.db, self.directory, self.keep)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the scheduler thread."""
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error backing up database: {e}")
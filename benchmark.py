@@ -0,0 +1,283 @@
+"""
+Concurrent load test for the Database layer.
+
+Runs simulated attendees and moderators against a throwaway database and reports
+throughput, latency percentiles and lock errors per scenario as JSON, so storage
+changes can be compared against a saved baseline before an event.
+
+Examples:
+    python benchmark.py
+    python benchmark.py --mode processes --workers 16 --past-questions 1000
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from database import Database
+from state_manager import StateManager
+from storage import STORAGE_MEMORY
+
+SCENARIOS = ["vote", "vote_hot", "poll", "submit", "moderate", "mixed"]
+TARGETS = ["database", "state_manager", "state_manager_batched", "state_manager_memory"]
+SHARED_TARGETS = ["state_manager_memory"]  # Must be the only writer, so all worker threads share one
+
+_shared_targets = {}  # db_file -> shared object under test
+_shared_targets_lock = threading.Lock()
+
+def create_target(db_file: str, target: str):
+    """Open the object under test: the raw Database or a StateManager on top of it."""
+    if target in SHARED_TARGETS:
+        with _shared_targets_lock:
+            if db_file not in _shared_targets:
+                _shared_targets[db_file] = StateManager(db_file, storage=STORAGE_MEMORY)
+            return _shared_targets[db_file]
+    if target == "state_manager":
+        return StateManager(db_file)
+    if target == "state_manager_batched":
+        return StateManager(db_file, batch_votes=True)
+    return Database(db_file)
+
+def close_target(target) -> None:
+    if target in _shared_targets.values():
+        return  # Closed by run_scenario once every worker is done
+    if isinstance(target, StateManager):
+        target.cleanup()
+    else:
+        target.close()
+
+def seed_database(db_file: str, past_questions: int, open_questions: int) -> list[int]:
+    """Create the benchmark database. Returns the ids of the questions attendees vote on."""
+    db = Database(db_file)
+    try:
+        for i in range(past_questions):
+            db.add_question(f"Past question {i}", "benchmark")
+        with db._get_connection() as conn:
+            conn.execute("UPDATE questions SET is_past = 1")
+
+        question_ids = [db.add_question(f"Open question {i}", "benchmark") for i in range(open_questions)]
+        db.set_active_question(question_ids[0])
+        return question_ids
+    finally:
+        db.close()
+
+def is_lock_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def run_worker(db_file: str, target_name: str, scenario: str, worker_index: int,
+               ops: int, question_ids: list[int]) -> dict:
+    """
+    Run one simulated client and return its raw measurements.
+    Module-level so it can be used as a multiprocessing target.
+    """
+    target = create_target(db_file, target_name)
+    rng = random.Random(worker_index)
+    latencies = {}
+    errors = 0
+    lock_errors = 0
+
+    def timed(op_name, func, *args):
+        nonlocal errors, lock_errors
+        start = time.perf_counter()
+        try:
+            func(*args)
+        except Exception as e:
+            errors += 1
+            if is_lock_error(e):
+                lock_errors += 1
+        latencies.setdefault(op_name, []).append(time.perf_counter() - start)
+
+    try:
+        for i in range(ops):
+            attendee_id = f"attendee-{worker_index}-{i}"
+            question_id = question_ids[i % len(question_ids)]
+            team = rng.choice(["bc", "fo"])
+
+            if scenario == "vote":
+                timed("vote", target.vote, question_id, team, attendee_id)
+            elif scenario == "vote_hot":
+                # Everyone votes on the same question at once, like the burst after it goes live
+                timed("vote", target.vote, question_ids[0], team, attendee_id)
+            elif scenario == "poll":
+                timed("get_state", target.get_state)
+            elif scenario == "submit":
+                timed("add_question", target.add_question, f"Question {worker_index}-{i}", f"Attendee {worker_index}")
+            elif scenario == "moderate":
+                action = i % 3
+                if action == 0:
+                    timed("set_active_question", target.set_active_question, rng.choice(question_ids))
+                elif action == 1:
+                    timed("set_question_winner", target.set_question_winner, rng.choice(question_ids), team)
+                else:
+                    timed("toggle_scores_blur", target.toggle_scores_blur)
+            elif scenario == "mixed":
+                # Worker 0 is the moderator; everyone else is an attendee who polls and votes
+                if worker_index == 0:
+                    if i % 10 == 0:
+                        timed("set_active_question", target.set_active_question, rng.choice(question_ids))
+                    timed("get_state", target.get_state)
+                elif i % 20 == 0:
+                    timed("add_question", target.add_question, f"Question {worker_index}-{i}", f"Attendee {worker_index}")
+                elif i % 2 == 0:
+                    timed("vote", target.vote, question_id, team, attendee_id)
+                else:
+                    timed("get_state", target.get_state)
+    finally:
+        close_target(target)
+
+    return {"latencies": latencies, "errors": errors, "lock_errors": lock_errors}
+
+def _run_worker_star(args):
+    return run_worker(*args)
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize_latencies(values: list[float]) -> dict:
+    """Latency summary in milliseconds."""
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "max": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+def run_scenario(args, scenario: str) -> dict:
+    """Run a scenario against a fresh database with all workers in parallel."""
+    work_dir = tempfile.mkdtemp(prefix="panel_showdown_bench_")
+    db_file = os.path.join(work_dir, "bench.db")
+    try:
+        question_ids = seed_database(db_file, args.past_questions, args.open_questions)
+        jobs = [
+            (db_file, args.target, scenario, worker_index, args.ops, question_ids)
+            for worker_index in range(args.workers)
+        ]
+
+        start = time.perf_counter()
+        if args.mode == "processes":
+            with multiprocessing.Pool(args.workers) as pool:
+                results = pool.map(_run_worker_star, jobs)
+        else:
+            results = [None] * len(jobs)
+
+            def run_job(index):
+                results[index] = run_worker(*jobs[index])
+
+            threads = [threading.Thread(target=run_job, args=(i,)) for i in range(len(jobs))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        shared_target = _shared_targets.pop(db_file, None)
+        if shared_target is not None:
+            shared_target.cleanup()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Merge per-worker measurements
+    latencies = {}
+    for result in results:
+        for op_name, values in result["latencies"].items():
+            latencies.setdefault(op_name, []).extend(values)
+    all_latencies = [value for values in latencies.values() for value in values]
+
+    return {
+        "ops": len(all_latencies),
+        "errors": sum(result["errors"] for result in results),
+        "lock_errors": sum(result["lock_errors"] for result in results),
+        "duration_s": round(elapsed, 3),
+        "throughput_ops_s": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": summarize_latencies(all_latencies),
+        "operations": {op_name: summarize_latencies(values) for op_name, values in sorted(latencies.items())},
+    }
+
+def compare_to_baseline(report: dict, baseline: dict) -> None:
+    """Print throughput and p95 latency changes relative to a saved report."""
+    print("\nCompared to baseline:", file=sys.stderr)
+    for scenario, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            print(f"  {scenario}: not in baseline", file=sys.stderr)
+            continue
+
+        def change(new, old):
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        print(
+            f"  {scenario}: throughput {result['throughput_ops_s']} ops/s "
+            f"({change(result['throughput_ops_s'], base['throughput_ops_s'])}), "
+            f"p95 {result['latency_ms']['p95']} ms "
+            f"({change(result['latency_ms']['p95'], base['latency_ms']['p95'])}), "
+            f"lock errors {result['lock_errors']} (was {base['lock_errors']})",
+            file=sys.stderr
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Panel Showdown database layer.")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads",
+                        help="Run simulated clients as threads or as separate processes")
+    parser.add_argument("--target", choices=TARGETS, default="database",
+                        help="Layer to benchmark (state_manager_memory: in-memory storage engine, threads mode only)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent simulated clients")
+    parser.add_argument("--ops", type=int, default=200, help="Operations per client")
+    parser.add_argument("--past-questions", type=int, default=0, help="Past questions to seed before running")
+    parser.add_argument("--open-questions", type=int, default=5, help="Open questions attendees vote on")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare the results against a previously saved JSON report")
+    args = parser.parse_args()
+    if args.target in SHARED_TARGETS and args.mode == "processes":
+        parser.error(f"--target {args.target} needs --mode threads: the in-memory engine lives in one process")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "mode": args.mode,
+            "target": args.target,
+            "workers": args.workers,
+            "ops_per_worker": args.ops,
+            "past_questions": args.past_questions,
+            "open_questions": args.open_questions,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "scenarios": {},
+    }
+    for scenario in args.scenario or SCENARIOS:
+        print(f"Running {scenario}...", file=sys.stderr)
+        report["scenarios"][scenario] = run_scenario(args, scenario)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            compare_to_baseline(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
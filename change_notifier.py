@@ -0,0 +1,144 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from database import DEFAULT_EVENT
+
+DATA_VERSION_POLL_SECONDS = 0.2  # How often waiters check for commits made by other processes
+EVENT_HISTORY = 256  # Recent change events kept to answer "what changed since revision N"
+
+def check_timeout(timeout: float) -> float:
+    """Return timeout if it is a usable wait in seconds, else raise ValueError (NaN or inf would never expire)."""
+    if not isinstance(timeout, (int, float)) or not math.isfinite(timeout) or timeout < 0:
+        raise ValueError(f"Timeout must be a finite, non-negative number of seconds, not {timeout!r}")
+    return timeout
+
+class ChangeEvent(NamedTuple):
+    revision: int
+    question_ids: Optional[frozenset]  # None when the affected questions are unknown (e.g. a reset)
+
+class ChangeNotifier:
+    """
+    In-process publish/subscribe for state changes of one event in a database file.
+
+    Writers in this process publish after committing and every waiter wakes at
+    once. Commits from other processes are picked up by watching SQLite's
+    PRAGMA data_version, which is only checked while someone is waiting.
+    """
+
+    def __init__(self, db_file: str, event: str = DEFAULT_EVENT,
+                 poll_interval: float = DATA_VERSION_POLL_SECONDS,
+                 read_revision: Optional[Callable[[], int]] = None):
+        """
+        Args:
+            db_file: Database file to watch
+            event: Event whose revision is tracked
+            poll_interval: How often waiters check for commits by other processes
+            read_revision: Where the current revision comes from, if not the database file
+                (an in-memory storage engine is ahead of its file until it flushes)
+        """
+        self.event = event
+        self.poll_interval = poll_interval
+        self._read_revision_override = read_revision
+        # Dedicated connection; only used while holding the condition's lock
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=EVENT_HISTORY)
+        self._data_version = self._read_data_version()
+        self._revision = self._read_revision()
+
+    @property
+    def revision(self) -> int:
+        """The latest state revision this notifier knows about."""
+        return self._revision
+
+    def publish(self, question_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Announce a change this process just committed and wake every waiter.
+
+        Args:
+            question_ids: Questions affected by the change, () if none, or None if unknown
+        """
+        with self._condition:
+            self._refresh(None if question_ids is None else frozenset(question_ids))
+
+    def wait_for_change(self, revision: Optional[int], timeout: float) -> Optional[ChangeEvent]:
+        """
+        Block until the state moves past revision or timeout seconds pass.
+        Returns the latest revision and the questions changed since revision, or None on timeout.
+        Raises ValueError if timeout is negative, NaN or infinite.
+        """
+        check_timeout(timeout)
+        if revision is None:
+            revision = -1
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._revision <= revision:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(remaining, self.poll_interval))
+                if self._revision <= revision and self._read_data_version() != self._data_version:
+                    # Nothing published here, but another connection committed (maybe to another event)
+                    self._refresh(None)
+            return ChangeEvent(self._revision, self._question_ids_since(revision))
+
+    def _refresh(self, question_ids: Optional[frozenset]) -> None:
+        """Re-read the revision and wake waiters if it moved. Caller holds the lock."""
+        self._data_version = self._read_data_version()
+        revision = self._read_revision()
+
+        if revision == self._revision and question_ids and self._events and self._events[-1].revision == revision:
+            # Another publisher already announced this revision; add our questions to it
+            last = self._events[-1]
+            if last.question_ids is not None:
+                self._events[-1] = ChangeEvent(revision, last.question_ids | question_ids)
+            return
+
+        if revision > self._revision:
+            # If the revision jumped by more than one, other writes we weren't told about are included
+            if revision > self._revision + 1:
+                question_ids = None
+            self._events.append(ChangeEvent(revision, question_ids))
+            self._revision = revision
+            self._condition.notify_all()
+
+    def _question_ids_since(self, revision: int) -> Optional[frozenset]:
+        """Union of the questions changed after revision, or None if unknown."""
+        events = [event for event in self._events if event.revision > revision]
+        if not events or events[0].revision > revision + 1 and revision >= 0:
+            return None  # Older than our history
+        question_ids = frozenset()
+        for event in events:
+            if event.question_ids is None:
+                return None
+            question_ids |= event.question_ids
+        return question_ids
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _read_revision(self) -> int:
+        if self._read_revision_override is not None:
+            return self._read_revision_override()
+        row = self._conn.execute("SELECT revision FROM state_revision WHERE event = ?", (self.event,)).fetchone()
+        return row[0] if row else 0
+
+_notifiers: dict[tuple, ChangeNotifier] = {}
+_notifiers_lock = threading.Lock()
+
+def get_change_notifier(db_file: str, event: str = DEFAULT_EVENT,
+                        read_revision: Optional[Callable[[], int]] = None) -> ChangeNotifier:
+    """
+    Get the process-wide change notifier for an event in a database file.
+    read_revision is only used when the notifier is created (see ChangeNotifier).
+    """
+    key = (os.path.abspath(db_file), event)
+    with _notifiers_lock:
+        if key not in _notifiers:
+            _notifiers[key] = ChangeNotifier(db_file, event, read_revision=read_revision)
+        return _notifiers[key]
@@ -0,0 +1,212 @@
+"""
+Randomized equivalence check between the in-memory storage engine and SQLite.
+
+Seeds a database with two events and copies it, then replays one seeded stream of
+random operations against Database on the first copy and MemoryDatabase on the
+second, with a flush interval short enough that flushes land between operations.
+The operations cover votes, batches, manual adjustments, winners, removals, resets,
+imports in every mode, backups and restores, so the write-through in add_question and
+the flush-and-reload in _rebuild are exercised along with the plain in-memory paths.
+
+After every step the results and the visible state must match. At checkpoints, and
+once more after close(), the memory engine's file must read back the same as the
+SQLite copy, keep the other event untouched, agree with its ledgers and have nothing
+for reconcile_tallies to repair. Exits non-zero on the first mismatch.
+
+Examples:
+    python check_memory_storage.py
+    python check_memory_storage.py --ops 10000 --seed 3
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from check_tallies import check_ledgers
+from database import DEFAULT_EVENT, IMPORT_MODES, Database
+from memory_database import MemoryDatabase
+
+TEAMS = ("bc", "fo")
+OTHER_EVENT = "other"  # Shares the file; the memory engine must never touch it
+ATTENDEES = 30
+CHECKPOINT_EVERY = 250  # Steps between comparisons of the flushed file
+FLUSH_INTERVAL_SECONDS = 0.005
+UNSTABLE_FIELDS = ("timestamp", "display_time")  # Clock readings, which differ between the engines
+
+def normalize(state: dict) -> dict:
+    """get_state without the revision, read time and per-question clock readings."""
+    state = {key: value for key, value in state.items() if key not in ("revision", "last_updated")}
+    for key in ("questions", "past_questions"):
+        if key in state:
+            state[key] = [{k: v for k, v in q.items() if k not in UNSTABLE_FIELDS} for q in state[key]]
+    if state.get("active"):
+        state["active"] = {k: v for k, v in state["active"].items() if k not in UNSTABLE_FIELDS}
+    return state
+
+def event_votes(db: Database) -> set:
+    """Every individual vote of the event, without its timestamp."""
+    return {(question_id, key, team) for question_id, key, team, _ in db.export_event()["votes"]}
+
+def seed(db_file: str) -> None:
+    """Questions, votes, adjustments and a winner in both events, written before the engines open."""
+    for event in (DEFAULT_EVENT, OTHER_EVENT):
+        db = Database(db_file, event=event)
+        ids = [db.add_question(f"{event} seed {i}", "seed") for i in range(5)]
+        db.vote(ids[0], "bc", "seed-attendee")
+        db.vote(ids[1], "fo", "seed-attendee")
+        db.add_votes(ids[2], "fo", 3)
+        db.set_question_winner(ids[3], "fo")
+        db.set_active_question(ids[4])
+        db.close()
+
+def fail(step: int, action: str, message: str) -> None:
+    sys.exit(f"Error at step {step} ({action}): {message}")
+
+def compare_files(step: int, sqlite_file: str, memory_file: str, memory: MemoryDatabase | None) -> None:
+    """The memory engine's file reads back like the SQLite copy, for both events."""
+    for event in (DEFAULT_EVENT, OTHER_EVENT):
+        expected, actual = Database(sqlite_file, event=event), Database(memory_file, event=event)
+        try:
+            if normalize(actual.get_state()) != normalize(expected.get_state()):
+                fail(step, "checkpoint", f"flushed state of event {event} differs from SQLite")
+            if event_votes(actual) != event_votes(expected):
+                fail(step, "checkpoint", f"flushed individual votes of event {event} differ from SQLite")
+            if event == DEFAULT_EVENT and memory is not None and actual.get_revision() != memory.get_revision():
+                fail(step, "checkpoint", "flushed revision lags the memory engine after flush()")
+            after_question_id = 0
+            while after_question_id is not None:
+                result = actual.reconcile_tallies(after_question_id)
+                if result["repaired"]:
+                    fail(step, "checkpoint", f"reconcile_tallies repaired the flushed file: {result['repaired']}")
+                after_question_id = result["next_question_id"]
+        finally:
+            expected.close()
+            actual.close()
+    problems = check_ledgers(memory_file)
+    if problems:
+        fail(step, "checkpoint", "flushed aggregates disagree with their ledgers: " + "; ".join(problems))
+
+def run(tmp_dir: str, ops: int, seed_value: int) -> None:
+    sqlite_file = os.path.join(tmp_dir, "sqlite.db")
+    memory_file = os.path.join(tmp_dir, "memory.db")
+    seed(sqlite_file)
+    shutil.copy(sqlite_file, memory_file)
+
+    rng = random.Random(seed_value)
+    sqlite = Database(sqlite_file)
+    memory = MemoryDatabase(memory_file, flush_interval=FLUSH_INTERVAL_SECONDS)
+    snapshots = None  # (SQLite backup, memory backup) taken at the same step
+    try:
+        for step in range(ops):
+            listed = sqlite.get_state(sections=["questions", "past_questions"])
+            ids = [q["id"] for q in listed["questions"] + listed["past_questions"]]
+            question_id = rng.choice(ids) if ids and rng.random() < 0.95 else 0
+            team = rng.choice(TEAMS)
+            attendee_id = f"attendee-{rng.randrange(ATTENDEES)}"
+            op = rng.random()
+
+            if op < 0.40:
+                action = "vote"
+                results = (sqlite.vote(question_id, team, attendee_id), memory.vote(question_id, team, attendee_id))
+            elif op < 0.46:
+                action = "vote_batch"
+                votes = [(rng.choice(ids + [0]), rng.choice(TEAMS), f"attendee-{rng.randrange(ATTENDEES)}")
+                         for _ in range(rng.randint(1, 8))]
+                results = (sqlite.vote_batch(votes), memory.vote_batch(votes))
+            elif op < 0.51:
+                action = "add_question"
+                results = (sqlite.add_question(f"Question {step}", "check"), memory.add_question(f"Question {step}", "check"))
+            elif op < 0.58:
+                action = "add_votes"
+                amount = rng.randint(1, 6)
+                results = (sqlite.add_votes(question_id, team, amount), memory.add_votes(question_id, team, amount))
+            elif op < 0.65:
+                action = "subtract_votes"
+                amount = rng.randint(1, 8)
+                results = (sqlite.subtract_votes(question_id, team, amount),
+                           memory.subtract_votes(question_id, team, amount))
+            elif op < 0.71:
+                action = "set_question_winner"
+                results = (sqlite.set_question_winner(question_id, team), memory.set_question_winner(question_id, team))
+            elif op < 0.77:
+                action = "set_active_question"
+                question = question_id if rng.random() < 0.9 else None
+                results = (sqlite.set_active_question(question), memory.set_active_question(question))
+            elif op < 0.79:
+                action = "remove_question"
+                results = (sqlite.remove_question(question_id), memory.remove_question(question_id))
+            elif op < 0.80:
+                action = "reset_votes"
+                results = (sqlite.reset_votes(), memory.reset_votes())
+            elif op < 0.81:
+                action = "toggle_scores_blur"
+                results = (sqlite.toggle_scores_blur(), memory.toggle_scores_blur())
+            elif op < 0.813:
+                action = "reset_questions"
+                results = (sqlite.reset_questions(), memory.reset_questions())
+            elif op < 0.825:
+                action = "import_questions"
+                mode = rng.choice(IMPORT_MODES)
+                questions = [{"text": f"Imported {step}.{i}", "author": "import"} for i in range(rng.randint(1, 4))]
+                if ids:
+                    questions.append({"id": rng.choice(ids), "text": f"Updated {step}", "author": "import"})
+                results = (sqlite.import_questions(questions, mode=mode), memory.import_questions(questions, mode=mode))
+            elif op < 0.83:
+                action = "backup"
+                snapshots = (os.path.join(tmp_dir, f"sqlite-{step}.db"), os.path.join(tmp_dir, f"memory-{step}.db"))
+                sqlite.backup(snapshots[0])
+                memory.backup(snapshots[1])
+                results = (None, None)
+            elif op < 0.834 and snapshots:
+                action = "restore"
+                results = (sqlite.restore(snapshots[0]), memory.restore(snapshots[1]))
+            elif op < 0.84:
+                action = "flush"
+                memory.flush()
+                results = (None, None)
+            else:
+                action = "reads"
+                page = {"questions_limit": rng.randint(0, 3), "past_limit": rng.randint(0, 2),
+                        "past_before": question_id or None}
+                results = (
+                    (sqlite.has_voted(question_id, attendee_id), sqlite.get_attendee_votes(attendee_id),
+                     normalize(sqlite.get_state(**page))),
+                    (memory.has_voted(question_id, attendee_id), memory.get_attendee_votes(attendee_id),
+                     normalize(memory.get_state(**page))),
+                )
+                # Series timestamps are clock readings, but the totals must match
+                series = [(sum(s["bc"]), sum(s["fo"])) for s in
+                          (sqlite.get_vote_series(question_id), memory.get_vote_series(question_id))]
+                if series[0] != series[1]:
+                    fail(step, action, f"vote series totals {series[1]}, expected {series[0]}")
+
+            if results[0] != results[1]:
+                fail(step, action, f"memory returned {results[1]!r}, SQLite {results[0]!r}")
+            if normalize(memory.get_state()) != normalize(sqlite.get_state()):
+                fail(step, action, "state differs from SQLite")
+            if step % CHECKPOINT_EVERY == CHECKPOINT_EVERY - 1:
+                memory.flush()
+                compare_files(step, sqlite_file, memory_file, memory)
+
+        memory.close()
+        memory = None
+        compare_files(ops, sqlite_file, memory_file, None)
+        print(f"OK: {ops} operations, the memory engine matched SQLite after every step and its file after close()")
+    finally:
+        sqlite.close()
+        if memory is not None:
+            memory.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Randomized equivalence check of the in-memory storage engine.")
+    parser.add_argument("--ops", type=int, default=3000, help="Random operations to run")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, to replay a failure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(tmp_dir, args.ops, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Randomized regression check for the trigger-maintained vote tallies and team scores.
+
+Replays a seeded stream of random operations (votes, batches, winners, manual
+adjustments, resets, removals) against two events in a throwaway database, and after
+every step compares each event with a plain Python model of the rules the triggers
+implement:
+- a question's count is its individual votes plus manual changes, never below zero
+- a manual change also moves the team score, never below zero, even without a question
+  (the moderator's score buttons with no active question)
+- a winner gets a point and a replaced winner gives its point back if it has one
+- resetting votes zeroes every count and score of the event, and nothing else
+
+It also checks the stored aggregates against their ledgers, and that reconcile_tallies
+finds nothing to repair. Exits non-zero on the first mismatch.
+
+Examples:
+    python check_tallies.py
+    python check_tallies.py --ops 20000 --seed 7
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+from database import DEFAULT_EVENT, Database
+
+TEAMS = ("bc", "fo")
+EVENTS = [DEFAULT_EVENT, "other"]  # Two events share the file, so cross-event leaks show up too
+ATTENDEES = 40
+
+class TallyModel:
+    """The expected tallies and scores of one event."""
+
+    def __init__(self):
+        self.counts = {}  # question_id -> {team: count}
+        self.winners = {}  # question_id -> winning team or None
+        self.voters = {}  # question_id -> {attendee_id: team}
+        self.scores = {"bc": 0, "fo": 0}
+        self.active = None
+
+    def add_question(self, question_id: int) -> None:
+        self.counts[question_id] = {"bc": 0, "fo": 0}
+        self.winners[question_id] = None
+        self.voters[question_id] = {}
+
+    def vote(self, question_id: int, team: str, attendee_id: str) -> bool:
+        if question_id not in self.counts or self.winners[question_id] is not None:
+            return False
+        if attendee_id in self.voters[question_id]:
+            return False
+        self.voters[question_id][attendee_id] = team
+        self.counts[question_id][team] += 1
+        return True
+
+    def adjust(self, question_id: int, team: str, amount: int) -> None:
+        if amount == 0:
+            return
+        if question_id in self.counts:
+            counts = self.counts[question_id]
+            counts[team] = max(0, counts[team] + amount)
+        self.scores[team] = max(0, self.scores[team] + amount)
+
+    def set_winner(self, question_id: int, team: str) -> None:
+        previous = self.winners.get(question_id, team)
+        if previous == team:
+            return  # Unknown question, or no change
+        if previous is not None and self.scores[previous] > 0:
+            self.scores[previous] -= 1
+        self.winners[question_id] = team
+        self.scores[team] += 1
+
+    def reset_votes(self) -> None:
+        for counts in self.counts.values():
+            counts.update(bc=0, fo=0)
+        self.scores = {"bc": 0, "fo": 0}
+
+    def set_active(self, question_id: int | None) -> None:
+        self.active = question_id if question_id in self.counts else None
+
+    def remove_question(self, question_id: int) -> None:
+        for table in (self.counts, self.winners, self.voters):
+            table.pop(question_id, None)
+        if self.active == question_id:
+            self.active = None
+
+def snapshot(db: Database) -> tuple:
+    """Scores and (id, bc, fo, winner) per question, as get_state reports them."""
+    state = db.get_state(sections=["questions", "past_questions", "votes"])
+    questions = sorted(
+        (q["id"], q["votes"]["bc"], q["votes"]["fo"], q["winner"])
+        for q in state["questions"] + state["past_questions"]
+    )
+    return state["votes"], questions
+
+def expected(model: TallyModel) -> tuple:
+    questions = sorted(
+        (question_id, counts["bc"], counts["fo"], model.winners[question_id])
+        for question_id, counts in model.counts.items()
+    )
+    return model.scores, questions
+
+def check_ledgers(db_file: str) -> list[str]:
+    """Stored aggregates that don't match individual votes plus their ledger."""
+    conn = sqlite3.connect(db_file)
+    try:
+        problems = [
+            f"question {question_id} {team}: stored {count}, ledger says {truth}"
+            for question_id, team, count, truth in conn.execute("""
+                SELECT v.question_id, v.team, v.count,
+                       (SELECT COUNT(*) FROM individual_votes iv
+                        WHERE iv.question_id = v.question_id AND iv.team = v.team)
+                     + (SELECT COALESCE(SUM(a.amount), 0) FROM vote_adjustments a
+                        WHERE a.question_id = v.question_id AND a.team = v.team) AS truth
+                FROM votes v
+                WHERE v.count != truth
+            """)
+        ]
+        problems += [
+            f"event {event} {team}: stored score {score}, ledger says {truth}"
+            for event, team, score, truth in conn.execute("""
+                SELECT s.event, s.team, s.score,
+                       (SELECT COALESCE(SUM(a.amount), 0) FROM score_adjustments a
+                        WHERE a.event = s.event AND a.team = s.team) AS truth
+                FROM team_scores s
+                WHERE s.score != truth
+            """)
+        ]
+        return problems
+    finally:
+        conn.close()
+
+def check_adjustment_without_question(db_file: str) -> None:
+    """The moderator's score buttons move the score even before any question is active."""
+    db = Database(db_file, event="no-questions")
+    try:
+        steps = [("add_votes", 10, 10), ("subtract_votes", 15, 0), ("add_votes", 10, 10)]
+        for method, amount, expected_score in steps:
+            getattr(db, method)(0, "bc", amount)
+            score = db.get_state(sections=["votes"])["votes"]["bc"]
+            if score != expected_score:
+                sys.exit(f"Error: {method}(0, 'bc', {amount}) with no active question left the score at "
+                         f"{score}, expected {expected_score}")
+    finally:
+        db.close()
+
+def run(db_file: str, ops: int, seed: int) -> None:
+    rng = random.Random(seed)
+    databases = {event: Database(db_file, event=event) for event in EVENTS}
+    models = {event: TallyModel() for event in EVENTS}
+    try:
+        for step in range(ops):
+            event = rng.choice(EVENTS)
+            db, model = databases[event], models[event]
+            # Mostly this event's questions; now and then another event's or a missing one
+            all_ids = [question_id for m in models.values() for question_id in m.counts]
+            own_ids = list(model.counts)
+            question_id = rng.choice(own_ids) if own_ids and rng.random() < 0.9 else rng.choice(all_ids + [0])
+            team = rng.choice(TEAMS)
+            attendee_id = f"attendee-{rng.randrange(ATTENDEES)}"
+            op = rng.random()
+
+            if op < 0.06 or not own_ids:
+                action = "add_question"
+                model.add_question(db.add_question(f"Question {step}", "check"))
+            elif op < 0.45:
+                action = "vote"
+                recorded = db.vote(question_id, team, attendee_id)
+                if recorded != model.vote(question_id, team, attendee_id):
+                    sys.exit(f"Error at step {step}: vote({question_id}, {team}, {attendee_id}) returned {recorded}")
+            elif op < 0.52:
+                action = "vote_batch"
+                votes = [(rng.choice(all_ids), rng.choice(TEAMS), f"attendee-{rng.randrange(ATTENDEES)}")
+                         for _ in range(rng.randint(1, 8))]
+                db.vote_batch(votes)
+                for vote in votes:
+                    model.vote(*vote)
+            elif op < 0.62:
+                action = "set_question_winner"
+                db.set_question_winner(question_id, team)
+                model.set_winner(question_id, team)
+            elif op < 0.75:
+                action = "add_votes"
+                amount = rng.randint(1, 15)
+                db.add_votes(question_id, team, amount)
+                model.adjust(question_id, team, amount)
+            elif op < 0.86:
+                action = "subtract_votes"
+                amount = rng.randint(1, 15)
+                db.subtract_votes(question_id, team, amount)
+                model.adjust(question_id, team, -amount)
+            elif op < 0.88:
+                # As the moderator view does it: against the active question, or 0 without one
+                action = "moderator_adjustment"
+                active = db.get_state(sections=["active_question"])["active_question"]
+                if active != model.active:
+                    sys.exit(f"Error at step {step}: active question is {active}, expected {model.active}")
+                amount = rng.choice([10, -10])
+                if amount > 0:
+                    db.add_votes(active or 0, team, amount)
+                else:
+                    db.subtract_votes(active or 0, team, -amount)
+                model.adjust(active or 0, team, amount)
+            elif op < 0.90:
+                action = "reset_votes"
+                db.reset_votes()
+                model.reset_votes()
+            elif op < 0.92:
+                action = "remove_question"
+                db.remove_question(question_id)
+                model.remove_question(question_id)
+            elif op < 0.97:
+                action = "set_active_question"
+                db.set_active_question(question_id)
+                model.set_active(question_id)
+            else:
+                action = "clear_active_question"
+                db.set_active_question(None)
+                model.set_active(None)
+
+            for checked_event in EVENTS:
+                actual = snapshot(databases[checked_event])
+                wanted = expected(models[checked_event])
+                if actual != wanted:
+                    sys.exit(f"Error at step {step} ({action} on event {event}, question {question_id}): "
+                             f"event {checked_event} is {actual}, expected {wanted}")
+
+        problems = check_ledgers(db_file)
+        if problems:
+            sys.exit("Error: aggregates disagree with their ledgers:\n  " + "\n  ".join(problems))
+        for event, db in databases.items():
+            after_question_id = 0
+            while after_question_id is not None:
+                result = db.reconcile_tallies(after_question_id)
+                if result["repaired"]:
+                    sys.exit(f"Error: reconcile_tallies repaired event {event}: {result['repaired']}")
+                after_question_id = result["next_question_id"]
+        print(f"OK: {ops} operations, tallies and scores matched the model after every step "
+              f"(final scores {', '.join(f'{event}={models[event].scores}' for event in EVENTS)})")
+    finally:
+        for db in databases.values():
+            db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Randomized check of the vote tally and team score triggers.")
+    parser.add_argument("--ops", type=int, default=3000, help="Random operations to run")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, to replay a failure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        check_adjustment_without_question(os.path.join(tmp_dir, "empty.db"))
+        run(os.path.join(tmp_dir, "check.db"), args.ops, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,636 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Connection pool settings
+POOL_SIZE = 8  # Maximum number of open connections shared by all threads
+POOL_TIMEOUT_SECONDS = 10  # How long to wait for a free connection before giving up
+
+# Per-connection pragmas
+BUSY_TIMEOUT_MS = 5000  # Wait this long for a lock instead of failing with "database is locked"
+CACHE_SIZE_KB = 8192  # Page cache per connection
+MMAP_SIZE_BYTES = 64 * 1024 * 1024  # Memory-map the database file for faster reads
+
+def attendee_key(attendee_id: str):
+    """
+    Compact storage key for an attendee id: the 16 raw bytes of a UUID (what
+    get_attendee_id hands out), or the id itself for any other kind of id.
+    """
+    try:
+        return uuid.UUID(attendee_id).bytes
+    except (ValueError, AttributeError, TypeError):
+        return attendee_id
+
+def attendee_id_from_key(key) -> str:
+    """The attendee id a stored key came from (the inverse of attendee_key)."""
+    if isinstance(key, bytes) and len(key) == 16:
+        return str(uuid.UUID(bytes=key))
+    return key
+
+def _epoch_seconds(timestamp: str) -> int:
+    """Convert a stored ISO timestamp (local time) to Unix epoch seconds."""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp())
+    except (ValueError, TypeError):
+        return 0
+
+def _copy_votes_to_attendee_keys(conn) -> None:
+    """Migration step: fill attendees and the compact vote table from the old individual_votes."""
+    conn.create_function("attendee_key", 1, attendee_key, deterministic=True)
+    conn.create_function("epoch_seconds", 1, _epoch_seconds, deterministic=True)
+    conn.execute("""
+        INSERT OR IGNORE INTO attendees (key)
+        SELECT DISTINCT attendee_key(attendee_id) FROM individual_votes
+    """)
+    conn.execute("""
+        INSERT INTO individual_votes_compact (question_id, attendee_id, team, timestamp)
+        SELECT iv.question_id, a.id, iv.team, epoch_seconds(iv.timestamp)
+        FROM individual_votes iv
+        JOIN attendees a ON a.key = attendee_key(iv.attendee_id)
+    """)
+
+# Schema migrations, applied in order inside one transaction. Migration N brings the
+# schema to version N, tracked in PRAGMA user_version. A step is either an SQL statement
+# or a function called with the connection, for conversions SQL can't do on its own.
+# Never edit a shipped migration; append a new one instead.
+MIGRATIONS = [
+    # 1: Base schema. Uses IF NOT EXISTS so databases created before versioning adopt it as-is.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            author TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT 0,
+            is_past BOOLEAN DEFAULT 0,
+            winner TEXT CHECK(winner IN ('bc', 'fo', NULL))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS votes (
+            question_id INTEGER,
+            team TEXT CHECK(team IN ('bc', 'fo')),
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (question_id, team),
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS individual_votes (
+            question_id INTEGER,
+            attendee_id TEXT NOT NULL,
+            team TEXT CHECK(team IN ('bc', 'fo')),
+            timestamp TEXT NOT NULL,
+            PRIMARY KEY (question_id, attendee_id),
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS team_scores (
+            team TEXT PRIMARY KEY CHECK(team IN ('bc', 'fo')),
+            score INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS display_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS state_revision (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO team_scores (team, score) VALUES ('bc', 0), ('fo', 0)",
+        "INSERT OR IGNORE INTO display_settings (key, value) VALUES ('scores_blurred', 'false')",
+        "INSERT OR IGNORE INTO state_revision (id, revision) VALUES (1, 0)",
+    ],
+    # 2: Indexes for the hot paths
+    [
+        # Active question lookup in get_state: covering, and only holds the active row
+        """
+        CREATE INDEX IF NOT EXISTS idx_questions_active
+        ON questions (is_active, winner) WHERE is_active = 1
+        """,
+        # Current and past question lists in get_state: filter and order without a sort
+        """
+        CREATE INDEX IF NOT EXISTS idx_questions_past
+        ON questions (is_past, id)
+        """,
+        # get_attendee_votes: covering, answers a whole page of vote lookups from the index
+        """
+        CREATE INDEX IF NOT EXISTS idx_individual_votes_attendee
+        ON individual_votes (attendee_id, question_id, team)
+        """,
+    ],
+    # 3: Maintain per-question vote counts inside SQLite, so a vote is a single INSERT
+    [
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_individual_votes_tally
+        AFTER INSERT ON individual_votes
+        BEGIN
+            UPDATE votes SET count = count + 1
+            WHERE question_id = NEW.question_id AND team = NEW.team;
+        END
+        """,
+    ],
+    # 4: Ledgers for manual changes, and triggers that keep every aggregate in step with them.
+    # votes.count = individual votes + vote_adjustments, team_scores.score = score_adjustments
+    [
+        """
+        CREATE TABLE IF NOT EXISTS vote_adjustments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_id INTEGER NOT NULL,
+            team TEXT NOT NULL CHECK(team IN ('bc', 'fo')),
+            requested INTEGER NOT NULL,  -- Change the moderator asked for, applied to the team score
+            amount INTEGER NOT NULL,  -- Effective change to the vote count after clamping at zero
+            reason TEXT NOT NULL,  -- 'manual' also moves the team score, 'reset'/'baseline' don't
+            timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_vote_adjustments_question
+        ON vote_adjustments (question_id, team, amount)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS score_adjustments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL CHECK(team IN ('bc', 'fo')),
+            amount INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            question_id INTEGER,
+            timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Backfill the ledgers so existing tallies already match their ground truth
+        """
+        INSERT INTO vote_adjustments (question_id, team, requested, amount, reason)
+        SELECT question_id, team, drift, drift, 'baseline'
+        FROM (
+            SELECT v.question_id, v.team, v.count - (
+                SELECT COUNT(*) FROM individual_votes iv
+                WHERE iv.question_id = v.question_id AND iv.team = v.team
+            ) AS drift
+            FROM votes v
+        )
+        WHERE drift != 0
+        """,
+        """
+        INSERT INTO score_adjustments (team, amount, reason)
+        SELECT team, score, 'baseline' FROM team_scores WHERE score != 0
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_individual_votes_untally
+        AFTER DELETE ON individual_votes
+        BEGIN
+            UPDATE votes SET count = count - 1
+            WHERE question_id = OLD.question_id AND team = OLD.team;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vote_adjustments_apply
+        AFTER INSERT ON vote_adjustments
+        BEGIN
+            UPDATE votes SET count = count + NEW.amount
+            WHERE question_id = NEW.question_id AND team = NEW.team;
+            
+            -- Manual adjustments also move the team score, never below zero
+            INSERT INTO score_adjustments (team, amount, reason, question_id)
+            SELECT team, MAX(NEW.requested, -score), 'manual', NEW.question_id
+            FROM team_scores
+            WHERE team = NEW.team AND NEW.reason = 'manual';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_score_adjustments_apply
+        AFTER INSERT ON score_adjustments
+        BEGIN
+            UPDATE team_scores SET score = score + NEW.amount
+            WHERE team = NEW.team;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_questions_winner
+        AFTER UPDATE OF winner ON questions
+        WHEN NEW.winner IS NOT OLD.winner
+        BEGIN
+            -- Take the point back from the previous winner, if it has one to give
+            INSERT INTO score_adjustments (team, amount, reason, question_id)
+            SELECT team, -1, 'winner_changed', NEW.id
+            FROM team_scores
+            WHERE team = OLD.winner AND score > 0;
+            
+            -- Award the point to the new winner
+            INSERT INTO score_adjustments (team, amount, reason, question_id)
+            SELECT NEW.winner, 1, 'winner', NEW.id
+            WHERE NEW.winner IS NOT NULL;
+        END
+        """,
+    ],
+    # 5: Store votes against a small integer attendee key and an integer epoch timestamp,
+    # instead of repeating a 36-character UUID and an ISO string in every row and index entry
+    [
+        """
+        CREATE TABLE IF NOT EXISTS attendees (
+            id INTEGER PRIMARY KEY,
+            key BLOB NOT NULL UNIQUE  -- attendee_key(): 16-byte UUID, or the original id if it isn't one
+        )
+        """,
+        """
+        CREATE TABLE individual_votes_compact (
+            question_id INTEGER NOT NULL,
+            attendee_id INTEGER NOT NULL,  -- attendees.id
+            team TEXT NOT NULL CHECK(team IN ('bc', 'fo')),
+            timestamp INTEGER NOT NULL,  -- Unix epoch seconds
+            PRIMARY KEY (question_id, attendee_id)
+        ) WITHOUT ROWID
+        """,
+        _copy_votes_to_attendee_keys,
+        # Swap the tables. The tallies already count every copied vote, so drop the tally
+        # triggers first and recreate them on the new table.
+        "DROP TRIGGER IF EXISTS trg_individual_votes_tally",
+        "DROP TRIGGER IF EXISTS trg_individual_votes_untally",
+        "DROP TABLE individual_votes",
+        "ALTER TABLE individual_votes_compact RENAME TO individual_votes",
+        """
+        CREATE INDEX idx_individual_votes_attendee
+        ON individual_votes (attendee_id, question_id, team)
+        """,
+        """
+        CREATE TRIGGER trg_individual_votes_tally
+        AFTER INSERT ON individual_votes
+        BEGIN
+            UPDATE votes SET count = count + 1
+            WHERE question_id = NEW.question_id AND team = NEW.team;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_individual_votes_untally
+        AFTER DELETE ON individual_votes
+        BEGIN
+            UPDATE votes SET count = count - 1
+            WHERE question_id = OLD.question_id AND team = OLD.team;
+        END
+        """,
+    ],
+    # 6: Event namespaces, so several panels can run from one database. Questions, team
+    # scores, display settings, the state revision and the score ledger belong to an event;
+    # votes and vote adjustments belong to a question and so to its event. Existing data
+    # becomes the "default" event.
+    [
+        # Triggers that reference the rebuilt tables go first and come back event-aware at the end
+        "DROP TRIGGER IF EXISTS trg_vote_adjustments_apply",
+        "DROP TRIGGER IF EXISTS trg_score_adjustments_apply",
+        "DROP TRIGGER IF EXISTS trg_questions_winner",
+        "ALTER TABLE questions ADD COLUMN event TEXT NOT NULL DEFAULT 'default'",
+        "DROP INDEX IF EXISTS idx_questions_active",
+        "DROP INDEX IF EXISTS idx_questions_past",
+        """
+        CREATE INDEX idx_questions_event_active
+        ON questions (event) WHERE is_active = 1
+        """,
+        """
+        CREATE INDEX idx_questions_event_past
+        ON questions (event, is_past, id)
+        """,
+        "ALTER TABLE score_adjustments ADD COLUMN event TEXT NOT NULL DEFAULT 'default'",
+        """
+        CREATE INDEX idx_score_adjustments_event
+        ON score_adjustments (event, team, amount)
+        """,
+        """
+        CREATE TABLE team_scores_by_event (
+            event TEXT NOT NULL,
+            team TEXT NOT NULL CHECK(team IN ('bc', 'fo')),
+            score INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (event, team)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO team_scores_by_event (event, team, score) SELECT 'default', team, score FROM team_scores",
+        "DROP TABLE team_scores",
+        "ALTER TABLE team_scores_by_event RENAME TO team_scores",
+        """
+        CREATE TABLE display_settings_by_event (
+            event TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (event, key)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO display_settings_by_event (event, key, value) SELECT 'default', key, value FROM display_settings",
+        "DROP TABLE display_settings",
+        "ALTER TABLE display_settings_by_event RENAME TO display_settings",
+        """
+        CREATE TABLE state_revision_by_event (
+            event TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO state_revision_by_event (event, revision) SELECT 'default', revision FROM state_revision",
+        "DROP TABLE state_revision",
+        "ALTER TABLE state_revision_by_event RENAME TO state_revision",
+        """
+        CREATE TRIGGER trg_vote_adjustments_apply
+        AFTER INSERT ON vote_adjustments
+        BEGIN
+            UPDATE votes SET count = count + NEW.amount
+            WHERE question_id = NEW.question_id AND team = NEW.team;
+            
+            -- Manual adjustments also move the team score of the question's event, never below zero
+            INSERT INTO score_adjustments (event, team, amount, reason, question_id)
+            SELECT s.event, s.team, MAX(NEW.requested, -s.score), 'manual', NEW.question_id
+            FROM questions q
+            JOIN team_scores s ON s.event = q.event AND s.team = NEW.team
+            WHERE q.id = NEW.question_id AND NEW.reason = 'manual';
+        END
+        """,
+        """
+        CREATE TRIGGER trg_score_adjustments_apply
+        AFTER INSERT ON score_adjustments
+        BEGIN
+            UPDATE team_scores SET score = score + NEW.amount
+            WHERE event = NEW.event AND team = NEW.team;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_questions_winner
+        AFTER UPDATE OF winner ON questions
+        WHEN NEW.winner IS NOT OLD.winner
+        BEGIN
+            -- Take the point back from the previous winner, if it has one to give
+            INSERT INTO score_adjustments (event, team, amount, reason, question_id)
+            SELECT event, team, -1, 'winner_changed', NEW.id
+            FROM team_scores
+            WHERE event = NEW.event AND team = OLD.winner AND score > 0;
+            
+            -- Award the point to the new winner
+            INSERT INTO score_adjustments (event, team, amount, reason, question_id)
+            SELECT NEW.event, NEW.winner, 1, 'winner', NEW.id
+            WHERE NEW.winner IS NOT NULL;
+        END
+        """,
+    ],
+    # 7: Per-second vote counts per question and team, kept by triggers like the tallies, so
+    # a question's momentum is read from a few rows instead of scanning its individual votes
+    [
+        """
+        CREATE TABLE vote_buckets (
+            question_id INTEGER NOT NULL,
+            second INTEGER NOT NULL,  -- Unix epoch second the votes arrived in
+            team TEXT NOT NULL CHECK(team IN ('bc', 'fo')),
+            count INTEGER NOT NULL,
+            PRIMARY KEY (question_id, second, team)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO vote_buckets (question_id, second, team, count)
+        SELECT question_id, timestamp, team, COUNT(*)
+        FROM individual_votes
+        GROUP BY question_id, timestamp, team
+        """,
+        """
+        CREATE TRIGGER trg_individual_votes_bucket
+        AFTER INSERT ON individual_votes
+        BEGIN
+            INSERT INTO vote_buckets (question_id, second, team, count)
+            VALUES (NEW.question_id, NEW.timestamp, NEW.team, 1)
+            ON CONFLICT (question_id, second, team) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_individual_votes_unbucket
+        AFTER DELETE ON individual_votes
+        BEGIN
+            UPDATE vote_buckets SET count = count - 1
+            WHERE question_id = OLD.question_id AND second = OLD.timestamp AND team = OLD.team;
+
+            DELETE FROM vote_buckets
+            WHERE question_id = OLD.question_id AND second = OLD.timestamp AND team = OLD.team AND count = 0;
+        END
+        """,
+    ],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+DEFAULT_EVENT = "default"  # The event used when none is given, and the one pre-event data belongs to
+
+RECONCILE_BATCH_SIZE = 100  # Questions verified per reconcile_tallies call
+
+# Online backups copy this many pages per step and pause between steps, which caps
+# backup I/O at roughly 256 KB per 20 ms (with 4 KB pages) so it never starves live requests
+BACKUP_PAGES_PER_STEP = 64
+BACKUP_STEP_PAUSE_SECONDS = 0.02
+
+# Sections get_state can return
+STATE_SECTIONS = ["active_question", "questions", "past_questions", "votes", "display_settings"]
+
+# Question import modes
+IMPORT_REPLACE = "replace"  # Wipe all questions first
+IMPORT_APPEND = "append"  # Add to the existing questions
+IMPORT_UPSERT = "upsert"  # Add, or update the question with the same id
+IMPORT_MODES = [IMPORT_REPLACE, IMPORT_APPEND, IMPORT_UPSERT]
+IMPORT_BATCH_SIZE = 500
+
+# Vote outcomes
+VOTE_RECORDED = "recorded"
+VOTE_ALREADY_VOTED = "already_voted"
+VOTE_LOCKED = "locked"  # The question already has a winner
+
+VOTE_SERIES_MAX_POINTS = 60  # Buckets in a vote series; longer questions get wider buckets
+
+def compact_vote_series(question_id: int, revision: int, seconds: Iterable[tuple[int, int, int]],
+                        max_points: int = VOTE_SERIES_MAX_POINTS) -> Dict:
+    """
+    Fold per-second vote counts into at most max_points equal buckets.
+
+    Args:
+        question_id: The question the counts belong to
+        revision: State revision the counts were read at
+        seconds: (epoch second, bc votes, fo votes) in ascending order of second
+        max_points: Most buckets to return
+
+    Returns:
+        {"question_id", "revision", "start": epoch second of the first bucket (None without votes),
+         "bucket_seconds", "bc": votes per bucket, "fo": votes per bucket}, with empty
+        buckets included so the lists line up with time
+    """
+    seconds = list(seconds)
+    series = {"question_id": question_id, "revision": revision, "start": None, "bucket_seconds": 1,
+              "bc": [], "fo": []}
+    if not seconds:
+        return series
+    start, end = seconds[0][0], seconds[-1][0]
+    bucket_seconds = max(1, -(-(end - start + 1) // max_points))  # Ceiling division
+    points = (end - start) // bucket_seconds + 1
+    bc, fo = [0] * points, [0] * points
+    for second, bc_votes, fo_votes in seconds:
+        bucket = (second - start) // bucket_seconds
+        bc[bucket] += bc_votes
+        fo[bucket] += fo_votes
+    series.update(start=start, bucket_seconds=bucket_seconds, bc=bc, fo=fo)
+    return series
+
+@lru_cache(maxsize=4096)
+def format_display_time(timestamp: str) -> str:
+    """Format a stored ISO timestamp for display (HH:MM:SS). Cached, as the same rows are read over and over."""
+    return datetime.fromisoformat(timestamp).strftime("%H:%M:%S")
 
 class Database:
-    def __init__(self, db_file: str = "panel_showdown.db"):
+    def __init__(self, db_file: str = "panel_showdown.db", pool_size: int = POOL_SIZE,
+                 event: str = DEFAULT_EVENT):
+        """
+        Args:
+            db_file: Path to the SQLite database file
+            pool_size: Maximum number of pooled connections
+            event: The event (panel session) this instance reads and writes. Several events
+                can share one database file; each only ever sees its own questions and scores.
+        """
+        if not isinstance(event, str) or not event.strip():
+            raise ValueError("Event must be a non-empty string")
         self.db_file = db_file
+        self.event = event
+        self._pool_size = pool_size
+        self._pool = queue.LifoQueue()  # Idle connections, most recently used first
+        self._pool_lock = threading.Lock()
+        self._connections = []  # Every open connection, so close() can reach them all
+        self._closed = False
         self._initialize_db()
+        self._ensure_event()
     
-    def _get_connection(self):
-        """Get a database connection with proper row factory."""
-        conn = sqlite3.connect(self.db_file)
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply the pragmas once."""
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False  # Pooled connections move between threads, but only one uses them at a time
+        )
         conn.row_factory = sqlite3.Row  # This enables column access by name
+        conn.execute("PRAGMA journal_mode = WAL")  # Readers no longer block on writers
+        conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, avoids an fsync per commit
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
         return conn
     
+    def _acquire_connection(self) -> sqlite3.Connection:
+        """Take an idle connection from the pool, opening a new one if the pool isn't full yet."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._pool_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            if len(self._connections) < self._pool_size:
+                conn = self._open_connection()
+                self._connections.append(conn)
+                return conn
+        
+        # Pool is full, wait for another thread to return a connection
+        try:
+            return self._pool.get(timeout=POOL_TIMEOUT_SECONDS)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+    
+    def _release_connection(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, or close it if the database was closed meanwhile."""
+        with self._pool_lock:
+            if not self._closed:
+                self._pool.put(conn)
+                return
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+    
+    @contextmanager
+    def _get_connection(self):
+        """Borrow a pooled connection. Commits on success and rolls back on error."""
+        conn = self._acquire_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release_connection(conn)
+    
+    def close(self) -> None:
+        """Close all pooled connections. Connections still in use are closed when they are returned."""
+        with self._pool_lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+                self._connections.remove(conn)
+                conn.close()
+    
     def _initialize_db(self):
-        """Initialize the database with required tables if they don't exist."""
+        """Bring the schema up to date. Does no DDL at all when the schema is already current."""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create questions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS questions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    text TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    is_active BOOLEAN DEFAULT 0,
-                    is_past BOOLEAN DEFAULT 0,
-                    winner TEXT CHECK(winner IN ('bc', 'fo', NULL))
-                )
-            """)
-            
-            # Create votes table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS votes (
-                    question_id INTEGER,
-                    team TEXT CHECK(team IN ('bc', 'fo')),
-                    count INTEGER DEFAULT 0,
-                    PRIMARY KEY (question_id, team),
-                    FOREIGN KEY (question_id) REFERENCES questions(id)
-                )
-            """)
-            
-            # Create individual_votes table to track per-attendee votes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS individual_votes (
-                    question_id INTEGER,
-                    attendee_id TEXT NOT NULL,
-                    team TEXT CHECK(team IN ('bc', 'fo')),
-                    timestamp TEXT NOT NULL,
-                    PRIMARY KEY (question_id, attendee_id),
-                    FOREIGN KEY (question_id) REFERENCES questions(id)
-                )
-            """)
-            
-            # Create team_scores table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS team_scores (
-                    team TEXT PRIMARY KEY CHECK(team IN ('bc', 'fo')),
-                    score INTEGER DEFAULT 0
-                )
-            """)
-            
-            # Create display_settings table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS display_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            """)
-            
-            # Initialize team scores if they don't exist
-            cursor.execute("""
-                INSERT OR IGNORE INTO team_scores (team, score)
-                VALUES ('bc', 0), ('fo', 0)
-            """)
-            
-            # Initialize display settings if they don't exist
-            cursor.execute("""
-                INSERT OR IGNORE INTO display_settings (key, value)
-                VALUES ('scores_blurred', 'false')
-            """)
+            if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                return
             
+            # Take the write lock before re-checking, so concurrent processes migrate only once
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target_version, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {target_version}")
             conn.commit()
     
+    def _ensure_event(self) -> None:
+        """Create this instance's event (its scores, settings and revision) if it doesn't exist yet."""
+        with self._get_connection() as conn:
+            if conn.execute("SELECT 1 FROM state_revision WHERE event = ?", (self.event,)).fetchone():
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO team_scores (event, team, score) VALUES (?, 'bc', 0), (?, 'fo', 0)",
+                         (self.event, self.event))
+            conn.execute("INSERT OR IGNORE INTO display_settings (event, key, value) VALUES (?, 'scores_blurred', 'false')",
+                         (self.event,))
+            conn.execute("INSERT OR IGNORE INTO state_revision (event, revision) VALUES (?, 0)", (self.event,))
+            conn.commit()
+    
+    def list_events(self) -> List[str]:
+        """Get the names of every event in the database."""
+        with self._get_connection() as conn:
+            return [row["event"] for row in conn.execute("SELECT event FROM state_revision ORDER BY event")]
+    
+    def _bump_revision(self, cursor) -> None:
+        """Advance the state revision so polling views know something changed."""
+        cursor.execute("UPDATE state_revision SET revision = revision + 1 WHERE event = ?", (self.event,))
+    
+    def get_revision(self) -> int:
+        """Get the current state revision."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT revision FROM state_revision WHERE event = ?", (self.event,))
+            return cursor.fetchone()["revision"]
+    
     def add_question(self, text: str, author: str) -> int:
         """Add a new question and return its ID."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             timestamp = datetime.now().isoformat()
             cursor.execute("""
-                INSERT INTO questions (text, author, timestamp, is_past, is_active)
-                VALUES (?, ?, ?, 0, 0)
-            """, (text, author, timestamp))
+                INSERT INTO questions (event, text, author, timestamp, is_past, is_active)
+                VALUES (?, ?, ?, ?, 0, 0)
+            """, (self.event, text, author, timestamp))
             question_id = cursor.lastrowid
             
             # Initialize votes for the new question
@@ -101,6 +639,7 @@ class Database:
                 VALUES (?, 'bc', 0), (?, 'fo', 0)
             """, (question_id, question_id))
             
+            self._bump_revision(cursor)
             conn.commit()
             return question_id
     
@@ -113,19 +652,59 @@ class Database:
             cursor.execute("""
                 UPDATE questions 
                 SET is_active = 0, is_past = 1
-                WHERE is_active = 1
-            """)
+                WHERE event = ? AND is_active = 1
+            """, (self.event,))
             
             # Then set new active question if provided
             if question_id is not None:
                 cursor.execute("""
                     UPDATE questions 
                     SET is_active = 1, is_past = 0
-                    WHERE id = ?
-                """, (question_id,))
+                    WHERE id = ? AND event = ?
+                """, (question_id, self.event))
             
+            self._bump_revision(cursor)
             conn.commit()
     
+    def _apply_vote(self, cursor, question_id: int, team: str, attendee_id: str) -> str:
+        """
+        Apply a single vote inside the caller's transaction.
+        Returns VOTE_RECORDED, VOTE_ALREADY_VOTED or VOTE_LOCKED.
+        """
+        # Every vote on a question bumps the same votes row, but that row is not a point of
+        # contention: SQLite has one write lock for the whole database, so writers serialize
+        # on the lock, not on rows, and spreading a counter over stripe rows would not let any
+        # more of them run at once. Throughput comes from holding the lock briefly (WAL with
+        # synchronous=NORMAL) and committing many votes per lock (vote_batch / VoteWriter).
+        # The tally update itself costs no measurable time within a batch.
+        key = attendee_key(attendee_id)
+        cursor.execute("""
+            INSERT INTO attendees (key) VALUES (?)
+            ON CONFLICT (key) DO NOTHING
+        """, (key,))
+        
+        # Record the vote if the question is open in this event (no winner yet). The primary
+        # key de-duplicates repeat votes and the tally trigger updates the vote count.
+        cursor.execute("""
+            INSERT OR IGNORE INTO individual_votes (question_id, attendee_id, team, timestamp)
+            SELECT ?, a.id, ?, ?
+            FROM attendees a
+            WHERE a.key = ? AND EXISTS (
+                SELECT 1 FROM questions WHERE id = ? AND event = ? AND winner IS NULL
+            )
+        """, (question_id, team, int(time.time()), key, question_id, self.event))
+        if cursor.rowcount == 1:
+            return VOTE_RECORDED
+        
+        # Rejected: only now look up whether the question is locked or the attendee already voted
+        cursor.execute("""
+            SELECT winner FROM questions WHERE id = ? AND event = ?
+        """, (question_id, self.event))
+        result = cursor.fetchone()
+        if result is None or result["winner"] is not None:
+            return VOTE_LOCKED  # Locked, or not a question of this event
+        return VOTE_ALREADY_VOTED
+    
     def vote(self, question_id: int, team: str, attendee_id: str) -> bool:
         """
         Record a vote for a question. Returns True if vote was recorded, False if attendee already voted.
@@ -139,69 +718,95 @@ class Database:
             raise ValueError("Team must be 'bc' or 'fo'")
         
         with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # Take the write lock up front instead of upgrading mid-transaction
             cursor = conn.cursor()
+            result = self._apply_vote(cursor, question_id, team, attendee_id)
+            if result != VOTE_RECORDED:
+                return False
             
-            # Check if question is locked (has a winner)
-            cursor.execute("""
-                SELECT winner FROM questions WHERE id = ?
-            """, (question_id,))
-            result = cursor.fetchone()
-            if result and result["winner"] is not None:
-                return False  # Question is locked
-            
-            # Check if attendee already voted for this question
-            cursor.execute("""
-                SELECT 1 FROM individual_votes 
-                WHERE question_id = ? AND attendee_id = ?
-            """, (question_id, attendee_id))
-            
-            if cursor.fetchone():
-                return False  # Attendee already voted
-            
-            # Record the individual vote
-            timestamp = datetime.now().isoformat()
-            cursor.execute("""
-                INSERT INTO individual_votes (question_id, attendee_id, team, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (question_id, attendee_id, team, timestamp))
-            
-            # Update question vote count
-            cursor.execute("""
-                UPDATE votes 
-                SET count = count + 1
-                WHERE question_id = ? AND team = ?
-            """, (question_id, team))
-            
+            self._bump_revision(cursor)
             conn.commit()
             return True
     
+    def vote_batch(self, votes: List[tuple[int, str, str]]) -> List[str]:
+        """
+        Record many votes in a single transaction (group commit).
+        
+        Args:
+            votes: List of (question_id, team, attendee_id) tuples, applied in order
+        
+        Returns:
+            One of VOTE_RECORDED, VOTE_ALREADY_VOTED or VOTE_LOCKED per vote, in the same order
+        """
+        for _, team, _ in votes:
+            if team not in ["bc", "fo"]:
+                raise ValueError("Team must be 'bc' or 'fo'")
+        
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            results = [
+                self._apply_vote(cursor, question_id, team, attendee_id)
+                for question_id, team, attendee_id in votes
+            ]
+            
+            if VOTE_RECORDED in results:
+                self._bump_revision(cursor)
+            conn.commit()
+            return results
+    
     def has_voted(self, question_id: int, attendee_id: str) -> tuple[bool, str | None]:
         """
-        Check if an attendee has voted for a question.
+        Check if an attendee has voted for a question of this event.
         Returns a tuple of (has_voted, team_voted_for).
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT team FROM individual_votes 
-                WHERE question_id = ? AND attendee_id = ?
-            """, (question_id, attendee_id))
+                SELECT iv.team
+                FROM attendees a
+                JOIN individual_votes iv ON iv.question_id = ? AND iv.attendee_id = a.id
+                JOIN questions q ON q.id = iv.question_id AND q.event = ?
+                WHERE a.key = ?
+            """, (question_id, self.event, attendee_key(attendee_id)))
             result = cursor.fetchone()
             if result:
                 return True, result["team"]
             return False, None
     
+    def get_attendee_votes(self, attendee_id: str) -> Dict[int, str]:
+        """
+        Get every vote cast by an attendee in this event.
+        Returns a dict mapping question_id to the team voted for.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT iv.question_id, iv.team
+                FROM attendees a
+                JOIN individual_votes iv ON iv.attendee_id = a.id
+                JOIN questions q ON q.id = iv.question_id AND q.event = ?
+                WHERE a.key = ?
+            """, (self.event, attendee_key(attendee_id)))
+            return {row["question_id"]: row["team"] for row in cursor.fetchall()}
+    
     def remove_question(self, question_id: int) -> None:
         """Remove a question from the queue."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM questions WHERE id = ? AND event = ?", (question_id, self.event))
+            if cursor.fetchone() is None:
+                return  # Not a question of this event
             
             # Remove votes first (due to foreign key constraint)
             cursor.execute("DELETE FROM votes WHERE question_id = ?", (question_id,))
+            cursor.execute("DELETE FROM individual_votes WHERE question_id = ?", (question_id,))
+            cursor.execute("DELETE FROM vote_adjustments WHERE question_id = ?", (question_id,))
             
             # Then remove the question
             cursor.execute("DELETE FROM questions WHERE id = ?", (question_id,))
             
+            self._bump_revision(cursor)
             conn.commit()
     
     def reset_votes(self) -> None:
@@ -209,117 +814,471 @@ class Database:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # Reset all vote counts
-            cursor.execute("UPDATE votes SET count = 0")
+            # Reset all vote counts by cancelling them out in the adjustment ledger
+            cursor.execute("""
+                INSERT INTO vote_adjustments (question_id, team, requested, amount, reason)
+                SELECT question_id, team, -count, -count, 'reset'
+                FROM votes
+                WHERE count != 0 AND question_id IN (SELECT id FROM questions WHERE event = ?)
+            """, (self.event,))
             
-            # Reset team scores
-            cursor.execute("UPDATE team_scores SET score = 0")
+            # Reset team scores the same way
+            cursor.execute("""
+                INSERT INTO score_adjustments (event, team, amount, reason)
+                SELECT event, team, -score, 'reset'
+                FROM team_scores WHERE event = ? AND score != 0
+            """, (self.event,))
             
+            self._bump_revision(cursor)
             conn.commit()
     
     def reset_questions(self) -> None:
         """Reset all questions (both current and past) and their associated votes."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            self._reset_questions(cursor)
+            self._bump_revision(cursor)
+            conn.commit()
+    
+    def _reset_questions(self, cursor) -> None:
+        """Delete all of this event's questions and votes inside the caller's transaction."""
+        # Delete all votes first (due to foreign key constraint)
+        event_questions = "SELECT id FROM questions WHERE event = ?"
+        cursor.execute(f"DELETE FROM votes WHERE question_id IN ({event_questions})", (self.event,))
+        cursor.execute(f"DELETE FROM individual_votes WHERE question_id IN ({event_questions})", (self.event,))
+        cursor.execute(f"DELETE FROM vote_adjustments WHERE question_id IN ({event_questions})", (self.event,))
+        
+        # Delete all questions
+        cursor.execute("DELETE FROM questions WHERE event = ?", (self.event,))
+        
+        # Reset team scores along with their ledger
+        cursor.execute("DELETE FROM score_adjustments WHERE event = ?", (self.event,))
+        cursor.execute("UPDATE team_scores SET score = 0 WHERE event = ?", (self.event,))
+    
+    def get_state(self, sections: Optional[Iterable[str]] = None,
+                  questions_limit: Optional[int] = None, questions_after: Optional[int] = None,
+                  past_limit: Optional[int] = None, past_before: Optional[int] = None,
+                  include_votes: bool = True) -> Dict:
+        """
+        Get the current state, or just the parts of it a view draws.
+        
+        Args:
+            sections: Which of STATE_SECTIONS to include (default: all of them)
+            questions_limit: Maximum number of current questions to return (oldest first)
+            questions_after: Keyset cursor, only return current questions with a higher id
+            past_limit: Maximum number of past questions to return (most recent first)
+            past_before: Keyset cursor, only return past questions with a lower id
+            include_votes: Include per-question vote counts
+        
+        The state always carries "revision" and "last_updated". When a list is limited,
+        "cursors" holds the cursor for its next page (None once there is nothing left).
+        """
+        sections = set(STATE_SECTIONS if sections is None else sections)
+        unknown = sections - set(STATE_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown state sections: {', '.join(sorted(unknown))}")
+        for name, limit in (("questions_limit", questions_limit), ("past_limit", past_limit)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} must not be negative")
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Read the revision first so a concurrent write always shows up as a newer revision
+            cursor.execute("SELECT revision FROM state_revision WHERE event = ?", (self.event,))
+            state = {
+                "revision": cursor.fetchone()["revision"],
+                "cursors": {}
+            }
             
-            # Delete all votes first (due to foreign key constraint)
-            cursor.execute("DELETE FROM votes")
-            cursor.execute("DELETE FROM individual_votes")
+            if "active_question" in sections:
+                # Get the active question, with its votes so views don't need the full question list
+                cursor.execute(f"""
+                    SELECT q.*{self._vote_columns(include_votes)}
+                    FROM questions q
+                    {self._vote_joins(include_votes)}
+                    WHERE q.event = ? AND q.is_active = 1
+                """, (self.event,))
+                row = cursor.fetchone()
+                state["active_question"] = row["id"] if row else None
+                state["active"] = self._question_row_to_dict(row, include_votes) if row else None
             
-            # Delete all questions
-            cursor.execute("DELETE FROM questions")
+            if "questions" in sections:
+                state["questions"], state["cursors"]["questions"] = self._fetch_questions(
+                    cursor, False, questions_limit, questions_after, include_votes
+                )
             
-            # Reset team scores
-            cursor.execute("UPDATE team_scores SET score = 0")
+            if "past_questions" in sections:
+                state["past_questions"], state["cursors"]["past_questions"] = self._fetch_questions(
+                    cursor, True, past_limit, past_before, include_votes
+                )
             
-            conn.commit()
+            if "votes" in sections:
+                # Get team scores
+                cursor.execute("SELECT team, score FROM team_scores WHERE event = ?", (self.event,))
+                votes = {"bc": 0, "fo": 0}
+                for row in cursor.fetchall():
+                    votes[row["team"]] = row["score"]
+                state["votes"] = votes
+            
+            if "display_settings" in sections:
+                # Get display settings
+                cursor.execute("SELECT value FROM display_settings WHERE event = ? AND key = 'scores_blurred'",
+                               (self.event,))
+                state["display_settings"] = {
+                    "scores_blurred": cursor.fetchone()["value"] == "true"
+                }
+            
+            state["last_updated"] = datetime.now().isoformat()
+            return state
+    
+    def _vote_columns(self, include_votes: bool) -> str:
+        return ", v_bc.count as bc_votes, v_fo.count as fo_votes" if include_votes else ""
+    
+    def _vote_joins(self, include_votes: bool) -> str:
+        if not include_votes:
+            return ""
+        return """
+            LEFT JOIN votes v_bc ON q.id = v_bc.question_id AND v_bc.team = 'bc'
+            LEFT JOIN votes v_fo ON q.id = v_fo.question_id AND v_fo.team = 'fo'
+        """
+    
+    def _fetch_questions(self, cursor, is_past: bool, limit: Optional[int],
+                         after: Optional[int], include_votes: bool) -> tuple[List[Dict], Optional[int]]:
+        """
+        Fetch one page of current (oldest first) or past (most recent first) questions.
+        Returns the questions and the cursor for the next page.
+        """
+        if limit == 0:
+            return [], None
+        query = f"""
+            SELECT q.*{self._vote_columns(include_votes)}
+            FROM questions q
+            {self._vote_joins(include_votes)}
+            WHERE q.event = ? AND q.is_past = ?
+        """
+        params = [self.event, 1 if is_past else 0]
+        if after is not None:
+            query += " AND q.id < ?" if is_past else " AND q.id > ?"
+            params.append(after)
+        query += " ORDER BY q.id DESC" if is_past else " ORDER BY q.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor.execute(query, params)
+        questions = [self._question_row_to_dict(row, include_votes) for row in cursor.fetchall()]
+        
+        next_cursor = None
+        if questions and len(questions) == limit:
+            next_cursor = questions[-1]["id"]
+        return questions, next_cursor
     
-    def get_state(self) -> Dict:
-        """Get the current state."""
+    def _question_row_to_dict(self, row, include_votes: bool = True) -> Dict:
+        question = {
+            "id": row["id"],
+            "text": row["text"],
+            "author": row["author"],
+            "timestamp": row["timestamp"],
+            "display_time": format_display_time(row["timestamp"]),  # Formatted once per read, not per render
+            "winner": row["winner"]
+        }
+        if include_votes:
+            question["votes"] = {
+                "bc": row["bc_votes"],
+                "fo": row["fo_votes"]
+            }
+        return question
+    
+    def get_state_if_changed(self, last_revision: Optional[int], **options) -> Optional[Dict]:
+        """
+        Get the current state only if it changed since last_revision.
+        Returns None when the state is unchanged, so callers can keep their previous copy.
+        Accepts the same options as get_state.
+        """
+        if last_revision is not None and self.get_revision() == last_revision:
+            return None
+        return self.get_state(**options)
+
+    def get_vote_series(self, question_id: int, max_points: int = VOTE_SERIES_MAX_POINTS) -> Dict:
+        """
+        Get how a question's individual votes arrived over time (see compact_vote_series).
+        Reads the question's per-second vote buckets, never its individual votes, and
+        returns an empty series for a question that isn't in this event.
+        """
         with self._get_connection() as conn:
+            conn.execute("BEGIN")  # Revision and buckets from the same snapshot
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT revision FROM state_revision WHERE event = ?", (self.event,))
+                revision = cursor.fetchone()["revision"]
+                # The primary key already has the rows in second order, so nothing is sorted
+                cursor.execute("""
+                    SELECT b.second,
+                           SUM(CASE WHEN b.team = 'bc' THEN b.count ELSE 0 END) AS bc,
+                           SUM(CASE WHEN b.team = 'fo' THEN b.count ELSE 0 END) AS fo
+                    FROM questions q
+                    JOIN vote_buckets b ON b.question_id = q.id
+                    WHERE q.id = ? AND q.event = ?
+                    GROUP BY b.second
+                    ORDER BY b.second
+                """, (question_id, self.event))
+                seconds = [tuple(row) for row in cursor.fetchall()]
+            finally:
+                conn.rollback()
+        return compact_vote_series(question_id, revision, seconds, max_points)
+
+    def reconcile_tallies(self, after_question_id: int = 0,
+                          limit: int = RECONCILE_BATCH_SIZE) -> Dict:
+        """
+        Verify the vote tallies of a slice of this event's questions (and its team scores) against
+        their ground truth, repairing any drift. Call repeatedly with next_question_id to walk all questions.
+        
+        A question's vote count must equal its individual votes plus its vote adjustments,
+        and a team score must equal the sum of its score adjustments.
+        
+        Returns:
+            {"checked": number of questions checked,
+             "repaired": list of (question_id or None for team scores, team, stored, expected),
+             "next_question_id": cursor for the next slice, or None after the last one}
+        """
+        with self._get_connection() as conn:
+            # Hold the write lock so no vote lands between reading and repairing
+            conn.execute("BEGIN IMMEDIATE")
             cursor = conn.cursor()
             
-            # Get display settings
-            cursor.execute("SELECT value FROM display_settings WHERE key = 'scores_blurred'")
-            scores_blurred = cursor.fetchone()["value"] == "true"
+            cursor.execute("""
+                SELECT v.question_id, v.team, v.count,
+                       (SELECT COUNT(*) FROM individual_votes iv
+                        WHERE iv.question_id = v.question_id AND iv.team = v.team)
+                       + (SELECT COALESCE(SUM(a.amount), 0) FROM vote_adjustments a
+                          WHERE a.question_id = v.question_id AND a.team = v.team) AS expected
+                FROM votes v
+                WHERE v.question_id IN (
+                    SELECT id FROM questions
+                    WHERE event = ? AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                )
+                ORDER BY v.question_id, v.team
+            """, (self.event, after_question_id, limit))
+            rows = cursor.fetchall()
+            question_ids = {row["question_id"] for row in rows}
+            
+            repaired = []
+            for row in rows:
+                if row["count"] != row["expected"]:
+                    repaired.append((row["question_id"], row["team"], row["count"], row["expected"]))
+                    cursor.execute("""
+                        UPDATE votes SET count = ?
+                        WHERE question_id = ? AND team = ?
+                    """, (row["expected"], row["question_id"], row["team"]))
             
-            # Get active question
             cursor.execute("""
-                SELECT id, winner FROM questions WHERE is_active = 1
-            """)
-            active_question = cursor.fetchone()
-            active_question_id = active_question["id"] if active_question else None
-            active_question_winner = active_question["winner"] if active_question else None
+                SELECT s.team, s.score,
+                       (SELECT COALESCE(SUM(a.amount), 0) FROM score_adjustments a
+                        WHERE a.event = s.event AND a.team = s.team) AS expected
+                FROM team_scores s
+                WHERE s.event = ?
+            """, (self.event,))
+            for row in cursor.fetchall():
+                if row["score"] != row["expected"]:
+                    repaired.append((None, row["team"], row["score"], row["expected"]))
+                    cursor.execute("UPDATE team_scores SET score = ? WHERE event = ? AND team = ?",
+                                   (row["expected"], self.event, row["team"]))
             
-            # Get all questions with their votes
+            if repaired:
+                self._bump_revision(cursor)
+            conn.commit()
+            
+            return {
+                "checked": len(question_ids),
+                "repaired": repaired,
+                "next_question_id": rows[-1]["question_id"] if len(question_ids) == limit else None
+            }
+
+    def export_event(self) -> Dict:
+        """
+        Read everything about this event in one consistent snapshot, for an in-memory copy
+        (see memory_database.MemoryDatabase). Tallies come from their ground truth, the
+        individual votes and the adjustment ledger, rather than the stored counts.
+        
+        Returns:
+            {"revision", "scores": {team: score}, "scores_blurred",
+             "questions": list of question rows with bc_adjustment and fo_adjustment,
+             "votes": list of (question_id, attendee key, team, epoch timestamp)}
+        """
+        with self._get_connection() as conn:
+            conn.execute("BEGIN")  # One read snapshot for all of the queries below
+            cursor = conn.cursor()
+            cursor.execute("SELECT revision FROM state_revision WHERE event = ?", (self.event,))
+            revision = cursor.fetchone()["revision"]
             cursor.execute("""
-                SELECT q.*, 
-                       v_bc.count as bc_votes,
-                       v_fo.count as fo_votes
+                SELECT q.id, q.text, q.author, q.timestamp, q.is_active, q.is_past, q.winner,
+                       COALESCE((SELECT SUM(a.amount) FROM vote_adjustments a
+                                 WHERE a.question_id = q.id AND a.team = 'bc'), 0) AS bc_adjustment,
+                       COALESCE((SELECT SUM(a.amount) FROM vote_adjustments a
+                                 WHERE a.question_id = q.id AND a.team = 'fo'), 0) AS fo_adjustment
                 FROM questions q
-                LEFT JOIN votes v_bc ON q.id = v_bc.question_id AND v_bc.team = 'bc'
-                LEFT JOIN votes v_fo ON q.id = v_fo.question_id AND v_fo.team = 'fo'
-                WHERE q.is_past = 0
+                WHERE q.event = ?
                 ORDER BY q.id
-            """)
-            questions = []
-            for row in cursor.fetchall():
-                questions.append({
-                    "id": row["id"],
-                    "text": row["text"],
-                    "author": row["author"],
-                    "votes": {
-                        "bc": row["bc_votes"],
-                        "fo": row["fo_votes"]
-                    },
-                    "timestamp": row["timestamp"],
-                    "winner": row["winner"]
-                })
-            
-            # Get past questions
+            """, (self.event,))
+            questions = [dict(row) for row in cursor.fetchall()]
             cursor.execute("""
-                SELECT q.*, 
-                       v_bc.count as bc_votes,
-                       v_fo.count as fo_votes
+                SELECT iv.question_id, a.key, iv.team, iv.timestamp
                 FROM questions q
-                LEFT JOIN votes v_bc ON q.id = v_bc.question_id AND v_bc.team = 'bc'
-                LEFT JOIN votes v_fo ON q.id = v_fo.question_id AND v_fo.team = 'fo'
-                WHERE q.is_past = 1
-                ORDER BY q.id DESC
-            """)
-            past_questions = []
-            for row in cursor.fetchall():
-                past_questions.append({
-                    "id": row["id"],
-                    "text": row["text"],
-                    "author": row["author"],
-                    "votes": {
-                        "bc": row["bc_votes"],
-                        "fo": row["fo_votes"]
-                    },
-                    "timestamp": row["timestamp"],
-                    "winner": row["winner"]
-                })
-            
-            # Get team scores
-            cursor.execute("SELECT * FROM team_scores")
-            votes = {"bc": 0, "fo": 0}
-            for row in cursor.fetchall():
-                votes[row["team"]] = row["score"]
-            
-            # Add display settings to state
-            state = {
-                "active_question": active_question_id,
+                JOIN individual_votes iv ON iv.question_id = q.id
+                JOIN attendees a ON a.id = iv.attendee_id
+                WHERE q.event = ?
+            """, (self.event,))
+            votes = [tuple(row) for row in cursor.fetchall()]
+            cursor.execute("SELECT team, score FROM team_scores WHERE event = ?", (self.event,))
+            scores = {row["team"]: row["score"] for row in cursor.fetchall()}
+            cursor.execute("SELECT value FROM display_settings WHERE event = ? AND key = 'scores_blurred'",
+                           (self.event,))
+            scores_blurred = cursor.fetchone()["value"] == "true"
+            return {
+                "revision": revision,
+                "scores": scores,
+                "scores_blurred": scores_blurred,
                 "questions": questions,
-                "past_questions": past_questions,
                 "votes": votes,
-                "display_settings": {
-                    "scores_blurred": scores_blurred
-                },
-                "last_updated": datetime.now().isoformat()
             }
+    
+    def write_event_snapshot(self, snapshot: Dict) -> None:
+        """
+        Overwrite this event's state with a snapshot from an in-memory copy, in one transaction.
+        
+        Questions, tallies and scores are rewritten whole; individual votes are only appended,
+        since the copy only ever adds them (apart from removing whole questions). The ledgers
+        are written as one summary row per question and team, so they keep matching the
+        tallies and scores. Rows are written in an order that keeps the triggers from
+        counting anything twice: a trigger that finds no tally or score row to update does nothing.
+        
+        Args:
+            snapshot: {"revision", "scores", "scores_blurred",
+                "questions": list of (id, text, author, timestamp, is_active, is_past, winner,
+                    bc_count, fo_count, bc_adjustment, fo_adjustment),
+                "new_votes": list of (question_id, attendee key, team, epoch timestamp) not written yet,
+                "removed_question_ids": questions deleted since the last snapshot}
+        """
+        event_questions = "SELECT id FROM questions WHERE event = ?"
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM individual_votes WHERE question_id = ?",
+                               [(question_id,) for question_id in snapshot["removed_question_ids"]])
+            cursor.execute(f"DELETE FROM vote_adjustments WHERE question_id IN ({event_questions})", (self.event,))
+            cursor.execute(f"DELETE FROM votes WHERE question_id IN ({event_questions})", (self.event,))
+            cursor.execute("DELETE FROM questions WHERE event = ?", (self.event,))
+            cursor.execute("DELETE FROM score_adjustments WHERE event = ?", (self.event,))
             
-            return state
+            cursor.executemany("""
+                INSERT INTO questions (id, event, text, author, timestamp, is_active, is_past, winner)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(q[0], self.event, *q[1:7]) for q in snapshot["questions"]])
+            
+            # No tally rows exist at this point, so the tally trigger leaves these votes uncounted
+            cursor.executemany("INSERT INTO attendees (key) VALUES (?) ON CONFLICT (key) DO NOTHING",
+                               [(key,) for _, key, _, _ in snapshot["new_votes"]])
+            cursor.executemany("""
+                INSERT OR IGNORE INTO individual_votes (question_id, attendee_id, team, timestamp)
+                SELECT ?, a.id, ?, ? FROM attendees a WHERE a.key = ?
+            """, [(question_id, team, timestamp, key) for question_id, key, team, timestamp in snapshot["new_votes"]])
+            
+            adjustments = []
+            counts = []
+            for q in snapshot["questions"]:
+                for team, count, adjustment in (("bc", q[7], q[9]), ("fo", q[8], q[10])):
+                    counts.append((q[0], team, count))
+                    if adjustment:
+                        adjustments.append((q[0], team, adjustment, adjustment))
+            cursor.executemany("""
+                INSERT INTO vote_adjustments (question_id, team, requested, amount, reason)
+                VALUES (?, ?, ?, ?, 'snapshot')
+            """, adjustments)
+            cursor.executemany("INSERT INTO votes (question_id, team, count) VALUES (?, ?, ?)", counts)
+            
+            # The score trigger adds these to team_scores, which is then set outright
+            cursor.executemany("""
+                INSERT INTO score_adjustments (event, team, amount, reason) VALUES (?, ?, ?, 'snapshot')
+            """, [(self.event, team, score) for team, score in snapshot["scores"].items() if score])
+            cursor.executemany("UPDATE team_scores SET score = ? WHERE event = ? AND team = ?",
+                               [(score, self.event, team) for team, score in snapshot["scores"].items()])
+            cursor.execute("UPDATE display_settings SET value = ? WHERE event = ? AND key = 'scores_blurred'",
+                           ("true" if snapshot["scores_blurred"] else "false", self.event))
+            cursor.execute("UPDATE state_revision SET revision = ? WHERE event = ?",
+                           (snapshot["revision"], self.event))
+            conn.commit()
+    
+    def backup(self, dest_path: str, pages_per_step: int = BACKUP_PAGES_PER_STEP,
+               pause_seconds: float = BACKUP_STEP_PAUSE_SECONDS) -> str:
+        """
+        Write a consistent snapshot of the database to dest_path while it stays in use.
+        
+        Copies a few pages at a time from a read transaction, so the snapshot is
+        consistent and (with WAL) voting carries on undisturbed. Holding one snapshot
+        also stops concurrent writes from restarting the copy, which would otherwise
+        never finish during a busy session. The file only appears at dest_path once complete.
+        
+        Returns:
+            dest_path
+        """
+        partial_path = f"{dest_path}.partial"
+        source = self._open_connection()
+        try:
+            # Pin one snapshot of the database for the whole copy
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM state_revision").fetchone()
+            
+            dest = sqlite3.connect(partial_path)
+            try:
+                source.backup(
+                    dest,
+                    pages=pages_per_step,
+                    progress=lambda status, remaining, total: time.sleep(pause_seconds) if remaining else None
+                )
+                dest.execute("PRAGMA journal_mode = DELETE")  # Keep the snapshot a single self-contained file
+            finally:
+                dest.close()
+            os.replace(partial_path, dest_path)
+            return dest_path
+        finally:
+            source.rollback()
+            source.close()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    
+    def restore(self, snapshot_path: str) -> None:
+        """
+        Replace the whole database (every event) with a snapshot made by backup().
+        
+        The copy is a single write transaction, so other connections see either the old
+        database or the snapshot, never a mix. Every event's revision keeps moving forward,
+        so every view notices the change.
+        """
+        if not os.path.exists(snapshot_path):
+            raise FileNotFoundError(snapshot_path)
+        
+        with self._get_connection() as conn:
+            previous_revisions = conn.execute("SELECT event, revision FROM state_revision").fetchall()
+        snapshot = sqlite3.connect(snapshot_path)
+        dest = self._open_connection()
+        try:
+            snapshot.backup(dest, pages=-1)  # One step: a single atomic write transaction
+        finally:
+            snapshot.close()
+            dest.close()
+        
+        # Snapshots from an older version of the app get migrated like any other database
+        self._initialize_db()
+        self._ensure_event()
+        with self._get_connection() as conn:
+            conn.execute("UPDATE state_revision SET revision = revision + 1")
+            conn.executemany("""
+                UPDATE state_revision SET revision = ? + 1 WHERE event = ? AND revision <= ?
+            """, [(row["revision"], row["event"], row["revision"]) for row in previous_revisions])
+            conn.commit()
     
     def add_votes(self, question_id: int, team: str, amount: int) -> None:
         """Add a specified number of votes to a question and update team score."""
@@ -327,33 +1286,7 @@ class Database:
             raise ValueError("Team must be 'bc' or 'fo'")
         if amount < 1:
             return
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            # Update question vote count
-            cursor.execute("""
-                UPDATE votes 
-                SET count = count + ?
-                WHERE question_id = ? AND team = ?
-            """, (amount, question_id, team))
-            # Prevent negative votes
-            cursor.execute("""
-                UPDATE votes 
-                SET count = 0
-                WHERE question_id = ? AND team = ? AND count < 0
-            """, (question_id, team))
-            # Update team score
-            cursor.execute("""
-                UPDATE team_scores 
-                SET score = score + ?
-                WHERE team = ?
-            """, (amount, team))
-            # Prevent negative team score
-            cursor.execute("""
-                UPDATE team_scores 
-                SET score = 0
-                WHERE team = ? AND score < 0
-            """, (team,))
-            conn.commit()
+        self._adjust_votes(question_id, team, amount)
 
     def subtract_votes(self, question_id: int, team: str, amount: int) -> None:
         """Subtract a specified number of votes from a question and update team score. Votes cannot go below zero."""
@@ -361,57 +1294,111 @@ class Database:
             raise ValueError("Team must be 'bc' or 'fo'")
         if amount < 1:
             return
+        self._adjust_votes(question_id, team, -amount)
+
+    def _adjust_votes(self, question_id: int, team: str, amount: int) -> None:
+        """
+        Record a manual vote adjustment. Triggers apply it to the question's vote count
+        and the team score, each clamped at zero. Without a question of this event (e.g.
+        no active question) only the team score moves.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            # Subtract from question vote count
-            cursor.execute("""
-                UPDATE votes 
-                SET count = count - ?
-                WHERE question_id = ? AND team = ?
-            """, (amount, question_id, team))
-            # Prevent negative votes
-            cursor.execute("""
-                UPDATE votes 
-                SET count = 0
-                WHERE question_id = ? AND team = ? AND count < 0
-            """, (question_id, team))
-            # Subtract from team score
-            cursor.execute("""
-                UPDATE team_scores 
-                SET score = score - ?
-                WHERE team = ?
-            """, (amount, team))
-            # Prevent negative team score
+            # Store the effective change to the vote count (never taking it below zero)
             cursor.execute("""
-                UPDATE team_scores 
-                SET score = 0
-                WHERE team = ? AND score < 0
-            """, (team,))
+                INSERT INTO vote_adjustments (question_id, team, requested, amount, reason)
+                SELECT ?, ?, ?, MAX(?, -COALESCE(
+                    (SELECT count FROM votes WHERE question_id = ? AND team = ?), 0
+                )), 'manual'
+                WHERE EXISTS (SELECT 1 FROM questions WHERE id = ? AND event = ?)
+            """, (question_id, team, amount, amount, question_id, team, question_id, self.event))
+            if not cursor.rowcount:
+                # No question to count it against: adjust this event's team score directly
+                cursor.execute("""
+                    INSERT INTO score_adjustments (event, team, amount, reason)
+                    SELECT event, team, MAX(?, -score), 'manual'
+                    FROM team_scores
+                    WHERE event = ? AND team = ?
+                """, (amount, self.event, team))
+            self._bump_revision(cursor)
             conn.commit()
 
     def load_initial_questions(self, questions_data: list) -> None:
         """Load initial questions from a list of question data."""
+        self.import_questions(questions_data, mode=IMPORT_REPLACE)
+
+    def import_questions(self, questions: Iterable[Dict], mode: str = IMPORT_REPLACE,
+                         batch_size: int = IMPORT_BATCH_SIZE,
+                         progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Bulk import questions in a single transaction using batched inserts.
+        
+        Args:
+            questions: Iterable of {"text", "author"} dicts (may be a generator streaming from a file).
+                With mode "upsert", entries carrying an "id" update that question instead of adding one.
+            mode: "replace" wipes all questions first, "append" adds to the existing ones,
+                "upsert" adds or updates by id
+            batch_size: Number of rows per executemany call
+            progress: Called with the running number of imported questions after each batch
+        
+        Returns:
+            The number of questions imported
+        """
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Import mode must be one of {', '.join(IMPORT_MODES)}")
+        
         with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
             cursor = conn.cursor()
-            # First reset all questions
-            self.reset_questions()
+            if mode == IMPORT_REPLACE:
+                self._reset_questions(cursor)
             
-            # Then insert new questions
             timestamp = datetime.now().isoformat()
-            for q in questions_data:
-                cursor.execute("""
-                    INSERT INTO questions (text, author, timestamp, is_active, is_past)
-                    VALUES (?, ?, ?, 0, 0)
-                """, (q["text"], q["author"], timestamp))
-                
-                # Initialize votes for the question
-                question_id = cursor.lastrowid
-                cursor.execute("""
-                    INSERT INTO votes (question_id, team, count)
-                    VALUES (?, 'bc', 0), (?, 'fo', 0)
-                """, (question_id, question_id))
+            imported = 0
+            new_rows = []
+            upsert_rows = []
+            
+            def flush():
+                if new_rows:
+                    cursor.executemany("""
+                        INSERT INTO questions (event, text, author, timestamp, is_active, is_past)
+                        VALUES (?, ?, ?, ?, 0, 0)
+                    """, new_rows)
+                    new_rows.clear()
+                if upsert_rows:
+                    # Ids taken by another event's questions are left alone
+                    cursor.executemany("""
+                        INSERT INTO questions (id, event, text, author, timestamp, is_active, is_past)
+                        VALUES (?, ?, ?, ?, ?, 0, 0)
+                        ON CONFLICT(id) DO UPDATE SET text = excluded.text, author = excluded.author
+                        WHERE questions.event = excluded.event
+                    """, upsert_rows)
+                    upsert_rows.clear()
+                if progress:
+                    progress(imported)
+            
+            for q in questions:
+                if mode == IMPORT_UPSERT and q.get("id") is not None:
+                    upsert_rows.append((q["id"], self.event, q["text"], q["author"], timestamp))
+                else:
+                    new_rows.append((self.event, q["text"], q["author"], timestamp))
+                imported += 1
+                if imported % batch_size == 0:
+                    flush()
+            flush()
             
+            # Initialize votes for every question that doesn't have them yet, in one statement
+            cursor.execute("""
+                INSERT OR IGNORE INTO votes (question_id, team, count)
+                SELECT q.id, t.team, 0
+                FROM questions q
+                CROSS JOIN (SELECT 'bc' AS team UNION ALL SELECT 'fo') t
+                WHERE q.event = ?
+            """, (self.event,))
+            
+            self._bump_revision(cursor)
             conn.commit()
+            return imported
 
     def toggle_scores_blur(self) -> bool:
         """Toggle the blur state of scores and return the new state."""
@@ -419,7 +1406,8 @@ class Database:
             cursor = conn.cursor()
             
             # Get current state
-            cursor.execute("SELECT value FROM display_settings WHERE key = 'scores_blurred'")
+            cursor.execute("SELECT value FROM display_settings WHERE event = ? AND key = 'scores_blurred'",
+                           (self.event,))
             current_state = cursor.fetchone()["value"] == "true"
             
             # Toggle state
@@ -427,49 +1415,26 @@ class Database:
             cursor.execute("""
                 UPDATE display_settings 
                 SET value = ? 
-                WHERE key = 'scores_blurred'
-            """, ("true" if new_state else "false",))
+                WHERE event = ? AND key = 'scores_blurred'
+            """, ("true" if new_state else "false", self.event))
             
+            self._bump_revision(cursor)
             conn.commit()
             return new_state
 
     def set_question_winner(self, question_id: int, team: str) -> None:
-        """Set the winner for a question and update team scores, handling re-awards."""
+        """Set the winner for a question. A trigger updates team scores, handling re-awards."""
         if team not in ["bc", "fo"]:
             raise ValueError("Team must be 'bc' or 'fo'")
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
-
-            # Get the current winner
-            cursor.execute("SELECT winner FROM questions WHERE id = ?", (question_id,))
-            result = cursor.fetchone()
-            prev_winner = result["winner"] if result else None
-
-            if prev_winner == team:
-                # No change, do nothing
-                return
-
-            # Update the winner
             cursor.execute("""
                 UPDATE questions 
                 SET winner = ?
-                WHERE id = ?
-            """, (team, question_id))
-
-            # Subtract a point from the previous winner, if any
-            if prev_winner in ["bc", "fo"]:
-                cursor.execute("""
-                    UPDATE team_scores 
-                    SET score = score - 1
-                    WHERE team = ? AND score > 0
-                """, (prev_winner,))
-
-            # Add a point to the new winner
-            cursor.execute("""
-                UPDATE team_scores 
-                SET score = score + 1
-                WHERE team = ?
-            """, (team,))
+                WHERE id = ? AND event = ? AND winner IS NOT ?
+            """, (team, question_id, self.event, team))
 
+            if cursor.rowcount:
+                self._bump_revision(cursor)
             conn.commit() 
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Back up and restore the Panel Showdown database, also while the app is running.
+
+Examples:
+    python db_backup.py backup
+    python db_backup.py list
+    python db_backup.py restore latest
+    python db_backup.py restore backups/panel_showdown-20250101-120000-000000.db
+"""
+import argparse
+import os
+import sys
+
+from backup_scheduler import BACKUP_DIR, BACKUP_KEEP, create_backup, list_backups
+from database import Database
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the Panel Showdown database.")
+    parser.add_argument("--db", default="panel_showdown.db", help="Database file")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="Backup directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup_parser = commands.add_parser("backup", help="Take a snapshot now")
+    backup_parser.add_argument("--keep", type=int, default=BACKUP_KEEP, help="Snapshots to keep")
+    commands.add_parser("list", help="List snapshots, oldest first")
+    restore_parser = commands.add_parser("restore", help="Replace the database with a snapshot")
+    restore_parser.add_argument("snapshot", help="Snapshot file, or 'latest'")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        if args.command == "backup":
+            print(f"Wrote {create_backup(db, args.dir, args.keep)}")
+        elif args.command == "list":
+            backups = list_backups(db, args.dir)
+            if not backups:
+                print(f"No backups in {args.dir}")
+            for path in backups:
+                print(f"{path}  ({os.path.getsize(path) / 1024:.0f} KB)")
+        elif args.command == "restore":
+            snapshot = args.snapshot
+            if snapshot == "latest":
+                backups = list_backups(db, args.dir)
+                if not backups:
+                    print(f"Error: no backups in {args.dir}", file=sys.stderr)
+                    sys.exit(1)
+                snapshot = backups[-1]
+            db.restore(snapshot)
+            print(f"Restored {args.db} from {snapshot}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
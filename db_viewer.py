@@ -1,86 +1,329 @@
+"""
+Inspect, export and analyse the Panel Showdown database from the command line.
+
+Everything is read-only and streamed: rows are pulled from SQLite a batch at a time
+and written out straight away, so memory use stays flat however big the event gets.
+
+Examples:
+    python db_viewer.py                          # Questions table (same as `questions`)
+    python db_viewer.py scores --watch           # Redraw the scores whenever the database changes
+    python db_viewer.py --event eu questions
+    python db_viewer.py export votes --format csv --output votes.csv
+    python db_viewer.py export questions --format jsonl
+    python db_viewer.py timeline 12 --bucket 10
+    python db_viewer.py participation
+"""
+import argparse
+import csv
+import json
+import os
 import sqlite3
-from tabulate import tabulate
 import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List
+
+from tabulate import tabulate
+
+from database import DEFAULT_EVENT, SCHEMA_VERSION, attendee_id_from_key
+
+FETCH_SIZE = 500  # Rows pulled from SQLite at a time, and rows per printed table page
+WATCH_POLL_SECONDS = 0.5
+EXPORT_KINDS = ["questions", "votes", "scores"]
+EXPORT_FORMATS = ["csv", "jsonl"]
+
+QUESTIONS_QUERY = """
+    SELECT q.id, q.text, q.author, q.timestamp, q.is_active, q.is_past, q.winner,
+           v_bc.count AS bc_votes, v_fo.count AS fo_votes
+    FROM questions q
+    LEFT JOIN votes v_bc ON q.id = v_bc.question_id AND v_bc.team = 'bc'
+    LEFT JOIN votes v_fo ON q.id = v_fo.question_id AND v_fo.team = 'fo'
+    WHERE q.event = ?
+    ORDER BY q.id
+"""
+
+VOTES_QUERY = """
+    SELECT iv.question_id, a.key AS attendee_key, iv.team, iv.timestamp
+    FROM questions q
+    JOIN individual_votes iv ON iv.question_id = q.id
+    JOIN attendees a ON a.id = iv.attendee_id
+    WHERE q.event = ?
+    ORDER BY iv.question_id, iv.attendee_id
+"""
+
+SCORES_QUERY = "SELECT team, score FROM team_scores WHERE event = ? ORDER BY team"
 
-def get_db_connection():
-    """Get a database connection with proper row factory."""
-    conn = sqlite3.connect("panel_showdown.db")
+def get_db_connection(db_file: str) -> sqlite3.Connection:
+    """Open the database read-only. Exits if it doesn't exist or hasn't been migrated by the app yet."""
+    if not os.path.exists(db_file):
+        sys.exit(f"Error: {db_file} does not exist")
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
     conn.row_factory = sqlite3.Row
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        sys.exit(f"Error: {db_file} has schema version {version}, expected {SCHEMA_VERSION}; "
+                 "start the app once to migrate it")
     return conn
 
-def view_questions():
-    """View all questions with their status."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Get all questions with their votes
-        cursor.execute("""
-            SELECT 
-                q.id,
-                q.text,
-                q.author,
-                q.timestamp,
-                q.is_active,
-                q.is_past,
-                v_bc.count as bc_votes,
-                v_fo.count as fo_votes
-            FROM questions q
-            LEFT JOIN votes v_bc ON q.id = v_bc.question_id AND v_bc.team = 'bc'
-            LEFT JOIN votes v_fo ON q.id = v_fo.question_id AND v_fo.team = 'fo'
-            ORDER BY q.id
-        """)
-        
-        rows = cursor.fetchall()
+def stream_rows(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+    """Yield the rows of a query, FETCH_SIZE at a time, from one consistent read snapshot."""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
         if not rows:
-            print("No questions in database.")
             return
-        
-        # Format the data for display
-        headers = ["ID", "Text", "Author", "Timestamp", "Active", "Past", "BC Votes", "FO Votes"]
-        data = []
-        for row in rows:
-            data.append([
+        yield from rows
+
+def print_table(rows: Iterable, headers: List[str], title: str) -> int:
+    """Print rows as tables of FETCH_SIZE rows each, so only one page is ever held. Returns the row count."""
+    print(f"\n{title}:")
+    page = []
+    count = 0
+    for row in rows:
+        page.append(row)
+        count += 1
+        if len(page) == FETCH_SIZE:
+            print(tabulate(page, headers=headers, tablefmt="grid"))
+            page = []
+    if page or not count:
+        print(tabulate(page, headers=headers, tablefmt="grid"))
+    return count
+
+def format_epoch(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+# --- Views ---
+
+def view_questions(conn: sqlite3.Connection, event: str) -> None:
+    """View all questions with their status."""
+    conn.execute("BEGIN")  # Table and summary from the same snapshot
+    try:
+        rows = (
+            [
                 row["id"],
                 row["text"][:50] + "..." if len(row["text"]) > 50 else row["text"],
                 row["author"],
                 row["timestamp"],
                 "✓" if row["is_active"] else "",
                 "✓" if row["is_past"] else "",
+                (row["winner"] or "").upper(),
                 row["bc_votes"],
-                row["fo_votes"]
-            ])
-        
-        print("\nQuestions in Database:")
-        print(tabulate(data, headers=headers, tablefmt="grid"))
-        
-        # Print summary
-        active = sum(1 for row in rows if row["is_active"])
-        past = sum(1 for row in rows if row["is_past"])
-        current = sum(1 for row in rows if not row["is_past"])
-        print(f"\nSummary: {len(rows)} total questions")
-        print(f"  - {active} active")
-        print(f"  - {current} current (non-past)")
-        print(f"  - {past} past")
-
-def view_team_scores():
+                row["fo_votes"],
+            ]
+            for row in stream_rows(conn, QUESTIONS_QUERY, (event,))
+        )
+        headers = ["ID", "Text", "Author", "Timestamp", "Active", "Past", "Winner", "BC Votes", "FO Votes"]
+        if not print_table(rows, headers, f"Questions in event '{event}'"):
+            print("No questions in database.")
+            return
+
+        # Print summary, counted by SQLite rather than from the rows above
+        summary = conn.execute("""
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(is_active), 0) AS active,
+                   COALESCE(SUM(is_past = 0), 0) AS current,
+                   COALESCE(SUM(is_past), 0) AS past
+            FROM questions WHERE event = ?
+        """, (event,)).fetchone()
+        print(f"\nSummary: {summary['total']} total questions")
+        print(f"  - {summary['active']} active")
+        print(f"  - {summary['current']} current (non-past)")
+        print(f"  - {summary['past']} past")
+    finally:
+        conn.rollback()
+
+def view_team_scores(conn: sqlite3.Connection, event: str) -> None:
     """View team scores."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM team_scores ORDER BY team")
-        rows = cursor.fetchall()
-        
-        if not rows:
-            print("No team scores in database.")
+    rows = ([row["team"].upper(), row["score"]] for row in stream_rows(conn, SCORES_QUERY, (event,)))
+    if not print_table(rows, ["Team", "Score"], f"Team Scores in event '{event}'"):
+        print("No team scores in database.")
+
+def view_timeline(conn: sqlite3.Connection, event: str, question_id: int, bucket_seconds: int) -> None:
+    """View when a question's individual votes arrived, per time bucket, with running totals."""
+    question = conn.execute("SELECT text FROM questions WHERE id = ? AND event = ?",
+                            (question_id, event)).fetchone()
+    if question is None:
+        print(f"No question {question_id} in event '{event}'.")
+        return
+
+    def timeline_rows():
+        bc_total = fo_total = 0
+        for row in stream_rows(conn, """
+            SELECT timestamp / ? * ? AS bucket,
+                   SUM(team = 'bc') AS bc, SUM(team = 'fo') AS fo
+            FROM individual_votes
+            WHERE question_id = ?
+            GROUP BY bucket
+            ORDER BY bucket
+        """, (bucket_seconds, bucket_seconds, question_id)):
+            bc_total += row["bc"]
+            fo_total += row["fo"]
+            yield [format_epoch(row["bucket"]), row["bc"], row["fo"], bc_total, fo_total]
+
+    headers = ["From", "BC", "FO", "BC Total", "FO Total"]
+    title = f"Vote timeline of question {question_id} ({question['text'][:50]}), {bucket_seconds}s buckets"
+    if not print_table(timeline_rows(), headers, title):
+        print("No votes on this question.")
+    print("Manual vote adjustments are not part of the timeline.")
+
+def view_participation(conn: sqlite3.Connection, event: str) -> None:
+    """View how many attendees voted, how often, and for which teams."""
+    questions = conn.execute("SELECT COUNT(*) FROM questions WHERE event = ?", (event,)).fetchone()[0]
+    attendees = votes = only_bc = only_fo = both = 0
+    votes_per_attendee = Counter()  # Votes cast -> attendees; at most one entry per question
+    # Walking the attendee index hands SQLite the votes already grouped, so it streams the
+    # groups instead of sorting every vote into a temporary B-tree first
+    for row in stream_rows(conn, """
+        SELECT attendee_id, COUNT(*) AS votes, SUM(team = 'bc') AS bc
+        FROM individual_votes INDEXED BY idx_individual_votes_attendee
+        WHERE question_id IN (SELECT id FROM questions WHERE event = ?)
+        GROUP BY attendee_id
+    """, (event,)):
+        attendees += 1
+        votes += row["votes"]
+        votes_per_attendee[row["votes"]] += 1
+        if row["bc"] == row["votes"]:
+            only_bc += 1
+        elif row["bc"] == 0:
+            only_fo += 1
+        else:
+            both += 1
+
+    if not attendees:
+        print(f"No votes in event '{event}'.")
+        return
+    print(f"\nParticipation in event '{event}':")
+    print(tabulate([
+        ["Attendees who voted", attendees],
+        ["Votes", votes],
+        ["Questions", questions],
+        ["Votes per attendee", f"{votes / attendees:.2f}"],
+        ["Only voted BC", only_bc],
+        ["Only voted FO", only_fo],
+        ["Voted for both", both],
+    ], tablefmt="grid"))
+    print("\nAttendees by number of votes cast:")
+    print(tabulate(
+        [[count, votes_per_attendee[count], f"{votes_per_attendee[count] / attendees:.1%}"]
+         for count in sorted(votes_per_attendee)],
+        headers=["Votes", "Attendees", "Share"], tablefmt="grid"
+    ))
+
+# --- Export ---
+
+def export_rows(conn: sqlite3.Connection, event: str, kind: str) -> tuple[List[str], Iterator[tuple]]:
+    """Column names and a row stream for one of EXPORT_KINDS."""
+    if kind == "questions":
+        columns = ["id", "text", "author", "timestamp", "is_active", "is_past", "winner", "bc_votes", "fo_votes"]
+        rows = (tuple(row) for row in stream_rows(conn, QUESTIONS_QUERY, (event,)))
+    elif kind == "votes":
+        columns = ["question_id", "attendee_id", "team", "timestamp"]
+        rows = (
+            (row["question_id"], attendee_id_from_key(row["attendee_key"]), row["team"], format_epoch(row["timestamp"]))
+            for row in stream_rows(conn, VOTES_QUERY, (event,))
+        )
+    else:
+        columns = ["team", "score"]
+        rows = (tuple(row) for row in stream_rows(conn, SCORES_QUERY, (event,)))
+    return columns, rows
+
+def export(conn: sqlite3.Connection, event: str, kind: str, output_format: str, output) -> int:
+    """Write one of EXPORT_KINDS as CSV or JSON lines, row by row. Returns the number of rows written."""
+    conn.execute("BEGIN")  # One consistent snapshot for the whole export
+    try:
+        columns, rows = export_rows(conn, event, kind)
+        count = 0
+        if output_format == "csv":
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                output.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+                count += 1
+        return count
+    finally:
+        conn.rollback()
+
+# --- Watch ---
+
+def watch(conn: sqlite3.Connection, render: Callable[[], None], poll_seconds: float = WATCH_POLL_SECONDS) -> None:
+    """Redraw whenever another connection commits, checking PRAGMA data_version; nothing is re-read otherwise."""
+    last_version = None
+    try:
+        while True:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != last_version:
+                last_version = version
+                print("\033[2J\033[H", end="")  # Clear the terminal
+                print(f"{datetime.now().strftime('%H:%M:%S')}  (watching, Ctrl+C to stop)")
+                render()
+                sys.stdout.flush()
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, export and analyse the Panel Showdown database.")
+    parser.add_argument("--db", default="panel_showdown.db", help="Database file")
+    parser.add_argument("--event", default=DEFAULT_EVENT, help="Event to look at")
+    parser.add_argument("--scores", action="store_true", help=argparse.SUPPRESS)  # Old spelling of `scores`
+    commands = parser.add_subparsers(dest="command")
+
+    def add_view(name: str, help_text: str) -> argparse.ArgumentParser:
+        view_parser = commands.add_parser(name, help=help_text)
+        view_parser.add_argument("--watch", action="store_true", help="Redraw whenever the database changes")
+        return view_parser
+
+    add_view("questions", "Questions with their status and votes (default)")
+    add_view("scores", "Team scores")
+    timeline_parser = add_view("timeline", "When a question's votes arrived")
+    timeline_parser.add_argument("question_id", type=int, help="Question to look at")
+    timeline_parser.add_argument("--bucket", type=int, default=60, help="Bucket size in seconds")
+    add_view("participation", "Attendee participation statistics")
+    export_parser = commands.add_parser("export", help="Stream questions, individual votes or scores to a file")
+    export_parser.add_argument("kind", choices=EXPORT_KINDS, help="What to export")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Output format")
+    export_parser.add_argument("--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    if args.command is None:
+        args.command = "scores" if args.scores else "questions"
+        args.watch = False
+    if args.command == "timeline" and args.bucket < 1:
+        parser.error("--bucket must be at least 1 second")
+
+    conn = get_db_connection(args.db)
+    try:
+        if args.command == "export":
+            if args.output:
+                with open(args.output, "w", newline="", encoding="utf-8") as output:
+                    count = export(conn, args.event, args.kind, args.format, output)
+                print(f"Wrote {count} {args.kind} rows to {args.output}", file=sys.stderr)
+            else:
+                try:
+                    export(conn, args.event, args.kind, args.format, sys.stdout)
+                except BrokenPipeError:
+                    # Piped into something like `head` that stopped reading; silence the flush at exit too
+                    sys.stdout = open(os.devnull, "w")
             return
-        
-        headers = ["Team", "Score"]
-        data = [[row["team"].upper(), row["score"]] for row in rows]
-        
-        print("\nTeam Scores:")
-        print(tabulate(data, headers=headers, tablefmt="grid"))
+
+        views = {
+            "questions": lambda: view_questions(conn, args.event),
+            "scores": lambda: view_team_scores(conn, args.event),
+            "timeline": lambda: view_timeline(conn, args.event, args.question_id, args.bucket),
+            "participation": lambda: view_participation(conn, args.event),
+        }
+        if args.watch:
+            watch(conn, views[args.command])
+        else:
+            views[args.command]()
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--scores":
-        view_team_scores()
-    else:
-        view_questions() 
\ No newline at end of file
+    main()
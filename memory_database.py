@@ -0,0 +1,489 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from database import (
+    BACKUP_PAGES_PER_STEP, BACKUP_STEP_PAUSE_SECONDS, DEFAULT_EVENT, IMPORT_REPLACE, RECONCILE_BATCH_SIZE,
+    STATE_SECTIONS, VOTE_ALREADY_VOTED, VOTE_LOCKED, VOTE_RECORDED, VOTE_SERIES_MAX_POINTS, Database, attendee_key,
+    compact_vote_series, format_display_time,
+)
+
+FLUSH_INTERVAL_SECONDS = 2.0  # Most recent writes a crash can lose
+TEAMS = ("bc", "fo")  # Index 0 and 1 of every per-team pair below
+
+class _Question:
+    __slots__ = ("id", "text", "author", "timestamp", "display_time", "winner", "is_active", "is_past",
+                 "tally", "adjustment", "voters", "momentum")
+
+    def __init__(self, question_id: int, text: str, author: str, timestamp: str, winner: Optional[str] = None,
+                 is_active: bool = False, is_past: bool = False):
+        self.id = question_id
+        self.text = text
+        self.author = author
+        self.timestamp = timestamp
+        self.display_time = format_display_time(timestamp)
+        self.winner = winner
+        self.is_active = is_active
+        self.is_past = is_past
+        self.tally = [0, 0]  # Individual votes per team
+        self.adjustment = [0, 0]  # Sum of manual changes and resets per team
+        self.voters = {}  # attendee key -> epoch timestamp << 1 | team index
+        self.momentum = {}  # epoch second -> individual votes per team that arrived in it
+
+    def add_vote(self, key, team_index: int, timestamp: int) -> None:
+        self.voters[key] = timestamp << 1 | team_index
+        self.tally[team_index] += 1
+        counts = self.momentum.get(timestamp)
+        if counts is None:
+            counts = self.momentum[timestamp] = [0, 0]
+        counts[team_index] += 1
+
+    def count(self, team_index: int) -> int:
+        return self.tally[team_index] + self.adjustment[team_index]
+
+    def to_dict(self, include_votes: bool) -> Dict:
+        question = {
+            "id": self.id,
+            "text": self.text,
+            "author": self.author,
+            "timestamp": self.timestamp,
+            "display_time": self.display_time,
+            "winner": self.winner,
+        }
+        if include_votes:
+            question["votes"] = {"bc": self.count(0), "fo": self.count(1)}
+        return question
+
+class MemoryDatabase:
+    """
+    In-memory storage engine for one event, with the same interface as Database.
+
+    Questions, votes and scores live in plain Python structures behind one lock, so
+    votes and reads take microseconds. The event is loaded from the SQLite file at
+    startup and written back every flush_interval seconds and on close(), trading the
+    last few seconds of writes in a crash for that speed.
+
+    The engine must be the only writer of its event: nothing written to the event
+    through SQLite while it runs survives the next flush. Other events in the same
+    file are not touched. Rare whole-event operations (imports, resets, restores) are
+    flushed and then run against SQLite, and the event is reloaded afterwards.
+    """
+
+    def __init__(self, db_file: str = "panel_showdown.db", event: str = DEFAULT_EVENT,
+                 flush_interval: float | None = FLUSH_INTERVAL_SECONDS):
+        """
+        Args:
+            db_file: SQLite database file the event is loaded from and flushed to
+            event: The event held in memory
+            flush_interval: Seconds between flushes; None only flushes on close() and backup()
+        """
+        self.db_file = db_file
+        self.event = event
+        self.store = Database(db_file, event=event)  # The durable copy
+        self._lock = threading.Lock()  # Guards the in-memory state
+        self._flush_lock = threading.Lock()  # Serializes writes to the durable copy
+        with self._lock:
+            self._load()
+        self.flush_interval = flush_interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        if flush_interval is not None:
+            self._thread = threading.Thread(target=self._run, name="memory-flush", daemon=True)
+            self._thread.start()
+
+    def _load(self) -> None:
+        """Replace the in-memory state with the durable copy. Caller holds the lock."""
+        data = self.store.export_event()
+        self._revision = data["revision"]
+        self._flushed_revision = data["revision"]
+        self._scores = [data["scores"].get("bc", 0), data["scores"].get("fo", 0)]
+        self._scores_blurred = data["scores_blurred"]
+        self._questions = {}
+        self._active_id = None
+        for row in data["questions"]:
+            question = _Question(row["id"], row["text"], row["author"], row["timestamp"], row["winner"],
+                                 bool(row["is_active"]), bool(row["is_past"]))
+            question.adjustment = [row["bc_adjustment"], row["fo_adjustment"]]
+            self._questions[question.id] = question
+            if question.is_active:
+                self._active_id = question.id
+        for question_id, key, team, timestamp in data["votes"]:
+            self._questions[question_id].add_vote(key, TEAMS.index(team), timestamp)
+        self._sorted_ids = None
+        self._new_votes = []  # Votes not flushed yet: (question_id, attendee key, team, timestamp)
+        self._removed_ids = set()  # Questions removed since the last flush
+
+    def _question_ids(self) -> List[int]:
+        """Question ids in ascending order, re-sorted only after questions were added or removed."""
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self._questions)
+        return self._sorted_ids
+
+    def _team_index(self, team: str) -> int:
+        if team not in TEAMS:
+            raise ValueError("Team must be 'bc' or 'fo'")
+        return TEAMS.index(team)
+
+    # --- Durability ---
+
+    def flush(self) -> bool:
+        """Write the event to SQLite if it changed since the last flush. Returns whether it wrote."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self, holding_lock: bool = False) -> bool:
+        """Snapshot under the lock, write outside it. Caller holds the flush lock (and maybe the lock)."""
+        if not holding_lock:
+            self._lock.acquire()
+        try:
+            if self._revision == self._flushed_revision:
+                return False
+            snapshot = {
+                "revision": self._revision,
+                "scores": dict(zip(TEAMS, self._scores)),
+                "scores_blurred": self._scores_blurred,
+                "questions": [
+                    (q.id, q.text, q.author, q.timestamp, int(q.is_active), int(q.is_past), q.winner,
+                     q.count(0), q.count(1), q.adjustment[0], q.adjustment[1])
+                    for q in self._questions.values()
+                ],
+                "new_votes": [vote for vote in self._new_votes if vote[0] in self._questions],
+                "removed_question_ids": list(self._removed_ids),
+            }
+            new_votes, removed_ids = self._new_votes, self._removed_ids
+            self._new_votes, self._removed_ids = [], set()
+        finally:
+            if not holding_lock:
+                self._lock.release()
+
+        try:
+            self.store.write_event_snapshot(snapshot)
+        except Exception:
+            # Keep what wasn't written for the next attempt
+            if not holding_lock:
+                self._lock.acquire()
+            try:
+                self._new_votes[:0] = new_votes
+                self._removed_ids |= removed_ids
+            finally:
+                if not holding_lock:
+                    self._lock.release()
+            raise
+        # Under the flush lock, so a concurrent write can only have moved the revision further
+        self._flushed_revision = snapshot["revision"]
+        return True
+
+    def _rebuild(self, operation: Callable):
+        """Flush, run a whole-event operation against SQLite, then reload the event from it."""
+        with self._flush_lock, self._lock:
+            self._flush(holding_lock=True)
+            try:
+                return operation()
+            finally:
+                self._load()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing in-memory state: {e}")
+
+    def close(self) -> None:
+        """Stop the flush thread, write the event to SQLite one last time and close the file."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self.store.close()
+
+    def backup(self, dest_path: str, pages_per_step: int = BACKUP_PAGES_PER_STEP,
+               pause_seconds: float = BACKUP_STEP_PAUSE_SECONDS) -> str:
+        """Flush, then snapshot the database file (see Database.backup)."""
+        self.flush()
+        return self.store.backup(dest_path, pages_per_step, pause_seconds)
+
+    def restore(self, snapshot_path: str) -> None:
+        """Replace the whole database with a snapshot (see Database.restore) and reload the event."""
+        self._rebuild(lambda: self.store.restore(snapshot_path))
+
+    def list_events(self) -> List[str]:
+        """Get the names of every event in the database."""
+        return self.store.list_events()
+
+    # --- Reads ---
+
+    def get_revision(self) -> int:
+        """Get the current state revision."""
+        with self._lock:
+            return self._revision
+
+    def get_state(self, sections: Optional[Iterable[str]] = None,
+                  questions_limit: Optional[int] = None, questions_after: Optional[int] = None,
+                  past_limit: Optional[int] = None, past_before: Optional[int] = None,
+                  include_votes: bool = True) -> Dict:
+        """Get the current state, or just the parts of it a view draws (see Database.get_state)."""
+        sections = set(STATE_SECTIONS if sections is None else sections)
+        unknown = sections - set(STATE_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown state sections: {', '.join(sorted(unknown))}")
+        for name, limit in (("questions_limit", questions_limit), ("past_limit", past_limit)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} must not be negative")
+
+        with self._lock:
+            state = {"revision": self._revision, "cursors": {}}
+            if "active_question" in sections:
+                active = self._questions.get(self._active_id)
+                state["active_question"] = self._active_id
+                state["active"] = active.to_dict(include_votes) if active else None
+            if "questions" in sections:
+                state["questions"], state["cursors"]["questions"] = self._fetch_questions(
+                    False, questions_limit, questions_after, include_votes
+                )
+            if "past_questions" in sections:
+                state["past_questions"], state["cursors"]["past_questions"] = self._fetch_questions(
+                    True, past_limit, past_before, include_votes
+                )
+            if "votes" in sections:
+                state["votes"] = dict(zip(TEAMS, self._scores))
+            if "display_settings" in sections:
+                state["display_settings"] = {"scores_blurred": self._scores_blurred}
+        state["last_updated"] = datetime.now().isoformat()
+        return state
+
+    def _fetch_questions(self, is_past: bool, limit: Optional[int], after: Optional[int],
+                         include_votes: bool) -> tuple[List[Dict], Optional[int]]:
+        """One page of current (oldest first) or past (most recent first) questions. Caller holds the lock."""
+        if limit == 0:
+            return [], None
+        ids = reversed(self._question_ids()) if is_past else self._question_ids()
+        questions = []
+        for question_id in ids:
+            if after is not None and (question_id >= after if is_past else question_id <= after):
+                continue
+            question = self._questions[question_id]
+            if question.is_past != is_past:
+                continue
+            questions.append(question.to_dict(include_votes))
+            if limit is not None and len(questions) == limit:
+                break
+        next_cursor = questions[-1]["id"] if questions and len(questions) == limit else None
+        return questions, next_cursor
+
+    def get_state_if_changed(self, last_revision: Optional[int], **options) -> Optional[Dict]:
+        """Get the current state only if it changed since last_revision (see Database.get_state_if_changed)."""
+        if last_revision is not None and self.get_revision() == last_revision:
+            return None
+        return self.get_state(**options)
+
+    def get_vote_series(self, question_id: int, max_points: int = VOTE_SERIES_MAX_POINTS) -> Dict:
+        """Get how a question's individual votes arrived over time (see Database.get_vote_series)."""
+        with self._lock:
+            question = self._questions.get(question_id)
+            seconds = [(second, *counts) for second, counts in question.momentum.items()] if question else []
+            revision = self._revision
+        seconds.sort()  # Votes arrive in time order, so this is nearly free
+        return compact_vote_series(question_id, revision, seconds, max_points)
+
+    def has_voted(self, question_id: int, attendee_id: str) -> tuple[bool, str | None]:
+        """
+        Check if an attendee has voted for a question.
+        Returns a tuple of (has_voted, team_voted_for).
+        """
+        key = attendee_key(attendee_id)
+        with self._lock:
+            question = self._questions.get(question_id)
+            packed = question.voters.get(key) if question else None
+        if packed is None:
+            return False, None
+        return True, TEAMS[packed & 1]
+
+    def get_attendee_votes(self, attendee_id: str) -> Dict[int, str]:
+        """
+        Get every vote cast by an attendee in this event.
+        Returns a dict mapping question_id to the team voted for.
+        """
+        key = attendee_key(attendee_id)
+        with self._lock:
+            votes = {}
+            for question in self._questions.values():
+                packed = question.voters.get(key)
+                if packed is not None:
+                    votes[question.id] = TEAMS[packed & 1]
+            return votes
+
+    # --- Writes ---
+
+    def add_question(self, text: str, author: str) -> int:
+        """Add a new question and return its ID."""
+        # Written to SQLite straight away, so ids stay unique across every event in the file.
+        # Holds the flush lock too, so a flush that started earlier can't delete the new row.
+        with self._flush_lock, self._lock:
+            question_id = self.store.add_question(text, author)
+            timestamp = datetime.now().isoformat()
+            self._questions[question_id] = _Question(question_id, text, author, timestamp)
+            self._sorted_ids = None
+            self._revision += 1
+            return question_id
+
+    def set_active_question(self, question_id: Optional[int]) -> None:
+        """Set the active question (None to clear). Move previous active to past questions."""
+        with self._lock:
+            previous = self._questions.get(self._active_id)
+            if previous is not None:
+                previous.is_active = False
+                previous.is_past = True
+            self._active_id = None
+            question = self._questions.get(question_id)
+            if question is not None:
+                question.is_active = True
+                question.is_past = False
+                self._active_id = question_id
+            self._revision += 1
+
+    def _apply_vote(self, question_id: int, team_index: int, attendee_id: str, timestamp: int) -> str:
+        """Apply a single vote. Caller holds the lock."""
+        question = self._questions.get(question_id)
+        if question is None or question.winner is not None:
+            return VOTE_LOCKED  # Locked, or not a question of this event
+        key = attendee_key(attendee_id)
+        if key in question.voters:
+            return VOTE_ALREADY_VOTED
+        question.add_vote(key, team_index, timestamp)
+        self._new_votes.append((question_id, key, TEAMS[team_index], timestamp))
+        return VOTE_RECORDED
+
+    def vote(self, question_id: int, team: str, attendee_id: str) -> bool:
+        """Record a vote for a question. Returns True if vote was recorded, False if attendee already voted."""
+        team_index = self._team_index(team)
+        with self._lock:
+            if self._apply_vote(question_id, team_index, attendee_id, int(time.time())) != VOTE_RECORDED:
+                return False
+            self._revision += 1
+            return True
+
+    def vote_batch(self, votes: List[tuple[int, str, str]]) -> List[str]:
+        """
+        Record many votes at once (see Database.vote_batch).
+        Returns one of VOTE_RECORDED, VOTE_ALREADY_VOTED or VOTE_LOCKED per vote, in the same order.
+        """
+        team_indexes = [self._team_index(team) for _, team, _ in votes]
+        timestamp = int(time.time())
+        with self._lock:
+            results = [
+                self._apply_vote(question_id, team_index, attendee_id, timestamp)
+                for (question_id, _, attendee_id), team_index in zip(votes, team_indexes)
+            ]
+            if VOTE_RECORDED in results:
+                self._revision += 1
+            return results
+
+    def remove_question(self, question_id: int) -> None:
+        """Remove a question from the queue."""
+        with self._lock:
+            if self._questions.pop(question_id, None) is None:
+                return  # Not a question of this event
+            if self._active_id == question_id:
+                self._active_id = None
+            self._removed_ids.add(question_id)
+            self._sorted_ids = None
+            self._revision += 1
+
+    def reset_votes(self) -> None:
+        """Reset all votes. Attendees still can't vote twice on the same question."""
+        with self._lock:
+            for question in self._questions.values():
+                for team_index in (0, 1):
+                    question.adjustment[team_index] -= question.count(team_index)
+            self._scores = [0, 0]
+            self._revision += 1
+
+    def reset_questions(self) -> None:
+        """Reset all questions (both current and past) and their associated votes."""
+        self._rebuild(self.store.reset_questions)
+
+    def add_votes(self, question_id: int, team: str, amount: int) -> None:
+        """Add a specified number of votes to a question and update team score."""
+        team_index = self._team_index(team)
+        if amount < 1:
+            return
+        self._adjust_votes(question_id, team_index, amount)
+
+    def subtract_votes(self, question_id: int, team: str, amount: int) -> None:
+        """Subtract a specified number of votes from a question and update team score. Votes cannot go below zero."""
+        team_index = self._team_index(team)
+        if amount < 1:
+            return
+        self._adjust_votes(question_id, team_index, -amount)
+
+    def _adjust_votes(self, question_id: int, team_index: int, amount: int) -> None:
+        """
+        Apply a manual change to the vote count and the team score, each clamped at zero.
+        Without a question of this event (e.g. no active question) only the team score moves.
+        """
+        with self._lock:
+            question = self._questions.get(question_id)
+            if question is not None:
+                question.adjustment[team_index] += max(amount, -question.count(team_index))
+            self._scores[team_index] += max(amount, -self._scores[team_index])
+            self._revision += 1
+
+    def load_initial_questions(self, questions_data: list) -> None:
+        """Load initial questions from a list of question data."""
+        self.import_questions(questions_data, mode=IMPORT_REPLACE)
+
+    def import_questions(self, questions: Iterable[Dict], mode: str = IMPORT_REPLACE, **options) -> int:
+        """Bulk import questions (see Database.import_questions). Returns the number imported."""
+        return self._rebuild(lambda: self.store.import_questions(questions, mode=mode, **options))
+
+    def toggle_scores_blur(self) -> bool:
+        """Toggle the blur state of scores and return the new state."""
+        with self._lock:
+            self._scores_blurred = not self._scores_blurred
+            self._revision += 1
+            return self._scores_blurred
+
+    def set_question_winner(self, question_id: int, team: str) -> None:
+        """Set the winner for a question, moving the point from the previous winner if there was one."""
+        team_index = self._team_index(team)
+        with self._lock:
+            question = self._questions.get(question_id)
+            if question is None or question.winner == team:
+                return
+            if question.winner is not None:
+                previous_index = TEAMS.index(question.winner)
+                if self._scores[previous_index] > 0:
+                    self._scores[previous_index] -= 1
+            question.winner = team
+            self._scores[team_index] += 1
+            self._revision += 1
+
+    def reconcile_tallies(self, after_question_id: int = 0, limit: int = RECONCILE_BATCH_SIZE) -> Dict:
+        """
+        Recount the individual votes of a slice of questions and repair any tally that drifted
+        (see Database.reconcile_tallies). Team scores have no separate ground truth in memory.
+        """
+        with self._lock:
+            question_ids = [question_id for question_id in self._question_ids() if question_id > after_question_id][:limit]
+            repaired = []
+            for question_id in question_ids:
+                question = self._questions[question_id]
+                recount = [0, 0]
+                for packed in question.voters.values():
+                    recount[packed & 1] += 1
+                for team_index in (0, 1):
+                    if question.tally[team_index] != recount[team_index]:
+                        expected = recount[team_index] + question.adjustment[team_index]
+                        repaired.append((question_id, TEAMS[team_index], question.count(team_index), expected))
+                        question.tally[team_index] = recount[team_index]
+            if repaired:
+                self._revision += 1
+            return {
+                "checked": len(question_ids),
+                "repaired": repaired,
+                "next_question_id": question_ids[-1] if len(question_ids) == limit else None,
+            }
@@ -0,0 +1,234 @@
+"""
+Opt-in timing instrumentation for the hot paths.
+
+When enabled (set PANEL_SHOWDOWN_METRICS=1, or call install()), every public Database,
+MemoryDatabase and StateManager method and every view render (show_*_view and the show_live_* fragments)
+is wrapped to record call counts, latency histograms, rows returned, errors and
+SQLITE_BUSY ("database is locked") failures.
+Nothing is wrapped unless it is enabled, so the default code path is unchanged.
+
+The numbers are per process and can be read as Prometheus text from render_prometheus(),
+the API server's /metrics endpoint, a file rewritten in the background
+(PANEL_SHOWDOWN_METRICS_FILE, "{pid}" is replaced with the process id), or the
+moderator view's debug panel.
+"""
+import functools
+import importlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+METRICS_ENV_VAR = "PANEL_SHOWDOWN_METRICS"
+METRICS_FILE_ENV_VAR = "PANEL_SHOWDOWN_METRICS_FILE"
+METRICS_FILE_INTERVAL_SECONDS = 10
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# What gets instrumented: (layer label, module, class name or None for the module's show_* functions)
+INSTRUMENTED = [
+    ("database", "database", "Database"),
+    ("database", "memory_database", "MemoryDatabase"),
+    ("state_manager", "state_manager", "StateManager"),
+    ("view", "views.audience_view", None),
+    ("view", "views.display_view", None),
+    ("view", "views.moderator_view", None),
+]
+
+class _OperationStats:
+    __slots__ = ("calls", "errors", "busy_errors", "rows", "latency_sum", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.busy_errors = 0
+        self.rows = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last one is +Inf
+
+_stats: Dict[tuple, _OperationStats] = {}  # (layer, method) -> stats
+_stats_lock = threading.Lock()
+_installed = False
+_install_lock = threading.Lock()
+
+def is_enabled() -> bool:
+    """Whether instrumentation is installed in this process."""
+    return _installed
+
+def install_from_env() -> bool:
+    """Install the instrumentation if PANEL_SHOWDOWN_METRICS is set. Returns whether it is installed."""
+    if os.environ.get(METRICS_ENV_VAR, "").lower() in ("1", "true", "yes"):
+        install()
+        metrics_file = os.environ.get(METRICS_FILE_ENV_VAR)
+        if metrics_file:
+            start_file_exporter(metrics_file.replace("{pid}", str(os.getpid())))
+    return _installed
+
+def install() -> None:
+    """Wrap the instrumented methods and view functions. Safe to call more than once."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for layer, module_name, class_name in INSTRUMENTED:
+            module = importlib.import_module(module_name)
+            if class_name is not None:
+                cls = getattr(module, class_name)
+                for name, func in list(vars(cls).items()):
+                    if callable(func) and not name.startswith("_"):
+                        setattr(cls, name, _instrument(layer, name, func))
+            else:
+                for name, func in list(vars(module).items()):
+                    if name.startswith("show_") and callable(func):
+                        setattr(module, name, _instrument(layer, name, func))
+        _installed = True
+
+def _instrument(layer: str, name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record(layer, name, time.perf_counter() - start, _count_rows(result), error)
+    return wrapper
+
+def _count_rows(result) -> int:
+    """Rows a call returned: the questions in a state dict, or the length of a list or mapping."""
+    if isinstance(result, dict) and "revision" in result:
+        rows = sum(len(value) for value in result.values() if isinstance(value, list))
+        return rows + (1 if result.get("active") else 0)
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    return 0
+
+def _is_busy_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def record(layer: str, method: str, seconds: float, rows: int = 0, error: Optional[Exception] = None) -> None:
+    """Record one call. Used by the wrappers; can also time code that isn't a method."""
+    bucket = len(LATENCY_BUCKETS)
+    for i, upper_bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= upper_bound:
+            bucket = i
+            break
+    with _stats_lock:
+        stats = _stats.get((layer, method))
+        if stats is None:
+            stats = _stats[(layer, method)] = _OperationStats()
+        stats.calls += 1
+        stats.rows += rows
+        stats.latency_sum += seconds
+        stats.buckets[bucket] += 1
+        if error is not None:
+            stats.errors += 1
+            if _is_busy_error(error):
+                stats.busy_errors += 1
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    with _stats_lock:
+        _stats.clear()
+
+def _snapshot() -> List[tuple]:
+    with _stats_lock:
+        return [
+            (layer, method, stats.calls, stats.errors, stats.busy_errors, stats.rows, stats.latency_sum, list(stats.buckets))
+            for (layer, method), stats in sorted(_stats.items())
+        ]
+
+def _estimate_percentile(buckets: List[int], pct: float) -> float:
+    """Estimate a latency percentile (seconds) by interpolating within the histogram bucket."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = pct / 100 * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+            upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return LATENCY_BUCKETS[-1]
+
+def summary() -> List[Dict]:
+    """Per-operation summary for display, latencies in milliseconds."""
+    rows = []
+    for layer, method, calls, errors, busy_errors, row_count, latency_sum, buckets in _snapshot():
+        rows.append({
+            "layer": layer,
+            "method": method,
+            "calls": calls,
+            "mean_ms": round(latency_sum / calls * 1000, 2) if calls else 0.0,
+            "p50_ms": round(_estimate_percentile(buckets, 50) * 1000, 2),
+            "p95_ms": round(_estimate_percentile(buckets, 95) * 1000, 2),
+            "p99_ms": round(_estimate_percentile(buckets, 99) * 1000, 2),
+            "rows": row_count,
+            "errors": errors,
+            "busy_errors": busy_errors,
+        })
+    return rows
+
+def render_prometheus() -> str:
+    """Render everything recorded so far in the Prometheus text exposition format."""
+    lines = [
+        "# HELP panel_showdown_calls_total Calls per instrumented operation.",
+        "# TYPE panel_showdown_calls_total counter",
+    ]
+    snapshot = _snapshot()
+    for layer, method, calls, *_ in snapshot:
+        lines.append(f'panel_showdown_calls_total{{layer="{layer}",method="{method}"}} {calls}')
+
+    for metric, help_text, index in (
+        ("panel_showdown_errors_total", "Calls that raised an exception.", 3),
+        ("panel_showdown_busy_errors_total", "Calls that failed with SQLITE_BUSY (database is locked).", 4),
+        ("panel_showdown_rows_returned_total", "Rows returned by instrumented operations.", 5),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for entry in snapshot:
+            lines.append(f'{metric}{{layer="{entry[0]}",method="{entry[1]}"}} {entry[index]}')
+
+    lines.append("# HELP panel_showdown_latency_seconds Latency of instrumented operations.")
+    lines.append("# TYPE panel_showdown_latency_seconds histogram")
+    for layer, method, calls, _, _, _, latency_sum, buckets in snapshot:
+        labels = f'layer="{layer}",method="{method}"'
+        cumulative = 0
+        for upper_bound, count in zip(LATENCY_BUCKETS, buckets):
+            cumulative += count
+            lines.append(f'panel_showdown_latency_seconds_bucket{{{labels},le="{upper_bound}"}} {cumulative}')
+        lines.append(f'panel_showdown_latency_seconds_bucket{{{labels},le="+Inf"}} {calls}')
+        lines.append(f"panel_showdown_latency_seconds_sum{{{labels}}} {latency_sum:.6f}")
+        lines.append(f"panel_showdown_latency_seconds_count{{{labels}}} {calls}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_file(path: str) -> None:
+    """Write the metrics to path atomically, for a node_exporter textfile collector or a tail."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(temp_path, path)
+
+def start_file_exporter(path: str, interval_seconds: float = METRICS_FILE_INTERVAL_SECONDS) -> threading.Thread:
+    """Rewrite the metrics file every interval_seconds in a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                write_prometheus_file(path)
+            except OSError as e:
+                print(f"Error writing metrics file: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-file-exporter", daemon=True)
+    thread.start()
+    return thread
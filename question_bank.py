@@ -0,0 +1,90 @@
+import json
+import re
+from typing import Dict, Iterator, TextIO
+
+CHUNK_SIZE = 64 * 1024
+
+# Start of the questions array in a {"questions": [...]} bank
+_QUESTIONS_ARRAY_START = re.compile(r'"questions"\s*:\s*\[')
+
+def iter_question_bank(path: str) -> Iterator[Dict]:
+    """
+    Stream questions from a question bank file without loading it all into memory.
+
+    Supported formats:
+        .jsonl: one {"text", "author"} object per line
+        .json: {"questions": [...]} (like data/initial_questions.json) or a top-level list
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            entries = _iter_json_lines(f)
+        else:
+            entries = _iter_json_array(f)
+        for index, entry in enumerate(entries):
+            yield _validate_question(entry, index)
+
+def _validate_question(entry, index: int) -> Dict:
+    """Check that an entry has the fields a question needs."""
+    if not isinstance(entry, dict) or not entry.get("text") or not entry.get("author"):
+        raise ValueError(f"Question #{index + 1} must be an object with 'text' and 'author'")
+    return entry
+
+def _iter_json_lines(f: TextIO) -> Iterator:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def _iter_json_array(f: TextIO) -> Iterator:
+    """Decode the elements of the questions array one at a time, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, eof
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    # Find where the array starts: either the document itself or its "questions" key
+    pos = None
+    while pos is None:
+        stripped = buffer.lstrip()
+        if stripped.startswith("["):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        match = _QUESTIONS_ARRAY_START.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if not read_more():
+            raise ValueError("Question bank has no 'questions' array")
+
+    while True:
+        # Skip whitespace and separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or not read_more():
+                break
+        if pos >= len(buffer):
+            raise ValueError("Question bank ended before the questions array was closed")
+        if buffer[pos] == "]":
+            return
+
+        try:
+            entry, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Probably an element cut off at the chunk boundary; read more and retry
+            if eof or not read_more():
+                raise
+            continue
+        yield entry
+
+        # Drop what has been consumed so the buffer stays about one chunk in size
+        buffer = buffer[end:]
+        pos = 0
@@ -1,16 +1,140 @@
-from database import Database
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+from backup_scheduler import BACKUP_DIR, BACKUP_KEEP, BackupScheduler, create_backup, list_backups
+from change_notifier import ChangeEvent, get_change_notifier
+from database import DEFAULT_EVENT, IMPORT_REPLACE, VOTE_RECORDED, VOTE_SERIES_MAX_POINTS
+from memory_database import FLUSH_INTERVAL_SECONDS
+from question_bank import iter_question_bank
+from storage import STORAGE_MEMORY, STORAGE_SQLITE, open_storage
+from tally_reconciler import TallyReconciler
+from vote_writer import VoteWriter
+
+# How long a cached state snapshot is trusted before checking the database again.
+# Writes made through a StateManager invalidate the cache immediately; the TTL only
+# bounds how long writes from other processes take to show up.
+SNAPSHOT_TTL_SECONDS = 1.0
+SNAPSHOT_MAX_ENTRIES = 64  # Distinct get_state option sets kept per database
+
+class StateSnapshotCache:
+    """
+    Process-wide cache of get_state() results for one event in a database file,
+    one entry per distinct set of get_state options.
+    
+    Concurrent readers of an expired snapshot wait on a single reload instead of
+    each reading the database, and a reload only does a full read if the state
+    revision actually moved.
+    """
+    
+    def __init__(self, ttl_seconds: float = SNAPSHOT_TTL_SECONDS, max_entries: int = SNAPSHOT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._load_lock = threading.Lock()
+        self._invalidate_lock = threading.Lock()
+        self._entries = OrderedDict()  # options key -> (state, expires_at), least recently used first
+        self._generation = 0  # Bumped on every invalidation
+    
+    def get(self, load: Callable[[dict | None], dict], key: Hashable = ()) -> dict:
+        """
+        Get the cached state for key, reloading it with load(previous_state) once it expires.
+        The returned dict is shared between sessions and must not be modified.
+        """
+        with self._load_lock:
+            state, expires_at = self._entries.get(key, (None, 0.0))
+            if state is not None and time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                return state
+            
+            generation = self._generation
+            state = load(state)
+            with self._invalidate_lock:
+                # Only trust the snapshot if no write invalidated it while we were reading
+                expires_at = time.monotonic() + self.ttl_seconds if generation == self._generation else 0.0
+                self._entries[key] = (state, expires_at)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return state
+    
+    def invalidate(self) -> None:
+        """Expire every snapshot so the next get() goes back to the database."""
+        with self._invalidate_lock:
+            self._generation += 1
+            for key, (state, _) in self._entries.items():
+                self._entries[key] = (state, 0.0)
+
+def state_options_key(options: dict) -> tuple:
+    """Hashable key for a set of get_state options; equal options give equal keys."""
+    return tuple(sorted(
+        (name, tuple(sorted(value)) if name == "sections" and value is not None else value)
+        for name, value in options.items()
+    ))
+
+_snapshot_caches: dict[tuple, StateSnapshotCache] = {}
+_snapshot_caches_lock = threading.Lock()
+
+def get_snapshot_cache(db_file: str, event: str = DEFAULT_EVENT) -> StateSnapshotCache:
+    """Get the process-wide snapshot cache for an event in a database file."""
+    key = (os.path.abspath(db_file), event)
+    with _snapshot_caches_lock:
+        if key not in _snapshot_caches:
+            _snapshot_caches[key] = StateSnapshotCache()
+        return _snapshot_caches[key]
 
 class StateManager:
-    def __init__(self, db_file: str = "panel_showdown.db"):
-        self.db = Database(db_file)
+    def __init__(self, db_file: str = "panel_showdown.db", event: str = DEFAULT_EVENT,
+                 batch_votes: bool = False, reconcile_interval: float | None = None,
+                 backup_interval: float | None = None, backup_dir: str = BACKUP_DIR,
+                 backup_keep: int = BACKUP_KEEP, storage: str = STORAGE_SQLITE,
+                 flush_interval: float | None = FLUSH_INTERVAL_SECONDS):
+        """
+        Args:
+            db_file: Path to the SQLite database file
+            event: The event (panel session) this manager works on; created if it doesn't exist
+            batch_votes: Route votes through a single writer thread that commits them in batches
+            reconcile_interval: If set, verify vote tallies in the background, one slice of
+                questions every this many seconds
+            backup_interval: If set, snapshot the database (all events) into backup_dir every this many seconds
+            backup_dir: Where snapshots are written
+            backup_keep: Number of snapshots kept in backup_dir
+            storage: "sqlite" commits every write to db_file; "memory" keeps the event in memory
+                and flushes it to db_file every flush_interval seconds, so the event must not be
+                written by any other process meanwhile
+            flush_interval: Seconds between flushes of the memory engine
+        """
+        self.db = open_storage(storage, db_file, event, flush_interval)
+        self.event = event
+        self.vote_writer = VoteWriter(self.db) if batch_votes else None
+        self.snapshot_cache = get_snapshot_cache(db_file, event)
+        # The memory engine's revision runs ahead of the file until it flushes
+        self.notifier = get_change_notifier(db_file, event,
+                                            self.db.get_revision if storage == STORAGE_MEMORY else None)
+        self.reconciler = None
+        if reconcile_interval is not None:
+            self.reconciler = TallyReconciler(
+                self.db,
+                reconcile_interval,
+                on_repair=lambda repairs: self._publish_change(qid for qid, _, _, _ in repairs if qid is not None)
+            )
+        self.backup_dir = backup_dir
+        self.backup_keep = backup_keep
+        self.backup_scheduler = None
+        if backup_interval is not None:
+            self.backup_scheduler = BackupScheduler(self.db, backup_interval, backup_dir, backup_keep)
     
     def add_question(self, text: str, author: str) -> int:
         """Add a new question and return its ID."""
-        return self.db.add_question(text, author)
+        question_id = self.db.add_question(text, author)
+        self._publish_change((question_id,))
+        return question_id
     
     def set_active_question(self, question_id: int | None) -> None:
         """Set the active question (None to clear)."""
         self.db.set_active_question(question_id)
+        self._publish_change()
     
     def vote(self, question_id: int, team: str, attendee_id: str) -> bool:
         """
@@ -21,7 +145,25 @@ class StateManager:
             team: The team being voted for ('bc' or 'fo')
             attendee_id: Unique identifier for the attendee (e.g., session ID or user name)
         """
-        return self.db.vote(question_id, team, attendee_id)
+        if self.vote_writer is not None:
+            recorded = self.vote_writer.submit(question_id, team, attendee_id).result() == VOTE_RECORDED
+        else:
+            recorded = self.db.vote(question_id, team, attendee_id)
+        if recorded:
+            self._publish_change((question_id,))
+        return recorded
+    
+    def submit_vote(self, question_id: int, team: str, attendee_id: str) -> Future:
+        """
+        Queue a vote without waiting for it to be written.
+        Returns a future that resolves to "recorded", "already_voted" or "locked".
+        Requires batch_votes=True.
+        """
+        if self.vote_writer is None:
+            raise RuntimeError("submit_vote requires StateManager(batch_votes=True)")
+        future = self.vote_writer.submit(question_id, team, attendee_id)
+        future.add_done_callback(lambda _: self._publish_change((question_id,)))
+        return future
     
     def has_voted(self, question_id: int, attendee_id: str) -> tuple[bool, str | None]:
         """
@@ -30,45 +172,157 @@ class StateManager:
         """
         return self.db.has_voted(question_id, attendee_id)
     
+    def get_attendee_votes(self, attendee_id: str) -> dict[int, str]:
+        """
+        Get every vote cast by an attendee in a single query.
+        Returns a dict mapping question_id to the team voted for.
+        """
+        return self.db.get_attendee_votes(attendee_id)
+    
     def remove_question(self, question_id: int) -> None:
         """Remove a question from the queue."""
         self.db.remove_question(question_id)
+        self._publish_change((question_id,))
     
     def reset_votes(self) -> None:
         """Reset all votes."""
         self.db.reset_votes()
+        self._publish_change()
     
     def reset_questions(self) -> None:
         """Reset all questions (both current and past) and their associated votes."""
         self.db.reset_questions()
+        self._publish_change()
+    
+    def get_state(self, **options) -> dict:
+        """
+        Get the current state from the process-wide snapshot cache.
+        Accepts the same options as Database.get_state (sections, limits, cursors, include_votes).
+        The returned dict is shared between sessions and must not be modified.
+        """
+        return self.snapshot_cache.get(lambda previous_state: self._load_state(previous_state, options),
+                                       state_options_key(options))
     
-    def get_state(self) -> dict:
-        """Get the current state."""
-        return self.db.get_state()
+    def _load_state(self, previous_state: dict | None, options: dict) -> dict:
+        """Reload a snapshot, skipping the full read if the revision hasn't moved."""
+        last_revision = previous_state["revision"] if previous_state else None
+        return self.db.get_state_if_changed(last_revision, **options) or previous_state
+    
+    def get_vote_series(self, question_id: int, max_points: int = VOTE_SERIES_MAX_POINTS) -> dict:
+        """
+        Get how a question's votes arrived over time, from the process-wide snapshot cache.
+        
+        Returns:
+            {"question_id", "revision", "start": epoch second of the first bucket (None without
+             votes), "bucket_seconds", "bc": votes per bucket, "fo": votes per bucket}, at most
+            max_points buckets long; manual vote adjustments are not included
+        
+        The returned dict is shared between sessions and must not be modified.
+        """
+        return self.snapshot_cache.get(
+            lambda previous_series: self._load_vote_series(previous_series, question_id, max_points),
+            ("vote_series", question_id, max_points)
+        )
+    
+    def _load_vote_series(self, previous_series: dict | None, question_id: int, max_points: int) -> dict:
+        """Reload a vote series, skipping the read if the revision hasn't moved."""
+        if previous_series is not None and previous_series["revision"] == self.db.get_revision():
+            return previous_series
+        return self.db.get_vote_series(question_id, max_points)
+    
+    def get_revision(self) -> int:
+        """Get the current state revision."""
+        return self.db.get_revision()
+    
+    def list_events(self) -> list[str]:
+        """Get the names of every event in the database."""
+        return self.db.list_events()
+    
+    def wait_for_change(self, revision: int | None, timeout: float) -> ChangeEvent | None:
+        """
+        Block until the state moves past revision, without querying the database while waiting.
+        Wakes immediately on writes made through any StateManager in this process; writes
+        from other processes are noticed within a fraction of a second.
+        
+        Returns:
+            A ChangeEvent with the new revision and the ids of the questions changed since
+            revision (None if unknown, e.g. after a reset), or None if timeout expired first
+        """
+        return self.notifier.wait_for_change(revision, timeout)
+    
+    def _publish_change(self, question_ids=None) -> None:
+        """Expire cached snapshots and wake sessions waiting for a change."""
+        self.snapshot_cache.invalidate()
+        self.notifier.publish(question_ids)
+    
+    def get_state_if_changed(self, last_revision: int | None, **options) -> dict | None:
+        """Get the current state, or None if nothing changed since last_revision."""
+        state = self.get_state(**options)
+        if last_revision is not None and state["revision"] == last_revision:
+            return None
+        return state
+    
+    def backup(self) -> str:
+        """Snapshot the database into the backup directory now, without pausing voting. Returns the snapshot path."""
+        return create_backup(self.db, self.backup_dir, self.backup_keep)
+    
+    def list_backups(self) -> list[str]:
+        """Snapshots in the backup directory, oldest first."""
+        return list_backups(self.db, self.backup_dir)
+    
+    def restore(self, snapshot_path: str) -> None:
+        """Atomically replace the database (every event) with a snapshot and refresh every view."""
+        self.db.restore(snapshot_path)
+        # Every event's state was replaced, not just this manager's
+        for event in self.db.list_events():
+            get_snapshot_cache(self.db.db_file, event).invalidate()
+            get_change_notifier(self.db.db_file, event).publish()
     
     def cleanup(self):
         """Clean up resources."""
-        pass  # SQLite connections are automatically closed when they go out of scope 
+        if self.backup_scheduler is not None:
+            self.backup_scheduler.stop()
+        if self.reconciler is not None:
+            self.reconciler.stop()
+        if self.vote_writer is not None:
+            self.vote_writer.stop()
+        self.db.close()
 
     def add_votes(self, question_id: int, team: str, amount: int) -> None:
         """Add a specified number of votes to a question and update team score."""
         self.db.add_votes(question_id, team, amount)
+        self._publish_change((question_id,))
 
     def subtract_votes(self, question_id: int, team: str, amount: int) -> None:
         """Subtract a specified number of votes from a question and update team score."""
         self.db.subtract_votes(question_id, team, amount)
+        self._publish_change((question_id,))
 
-    def load_initial_questions(self, json_file: str) -> None:
-        """Load initial questions from a JSON file."""
-        import json
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-            self.db.load_initial_questions(data["questions"])
+    def load_initial_questions(self, json_file: str, mode: str = IMPORT_REPLACE,
+                               progress: Callable[[int], None] | None = None) -> int:
+        """
+        Load questions from a JSON or JSONL question bank, streaming it in batches.
+        
+        Args:
+            json_file: Path to a {"questions": [...]} JSON file or a JSONL file
+            mode: "replace" (default) wipes existing questions, "append" adds to them,
+                "upsert" adds or updates questions by id
+            progress: Called with the running number of imported questions
+        
+        Returns:
+            The number of questions imported
+        """
+        imported = self.db.import_questions(iter_question_bank(json_file), mode=mode, progress=progress)
+        self._publish_change()
+        return imported
 
     def toggle_scores_blur(self) -> bool:
         """Toggle the blur state of scores and return the new state."""
-        return self.db.toggle_scores_blur()
+        new_state = self.db.toggle_scores_blur()
+        self._publish_change(())
+        return new_state
 
     def set_question_winner(self, question_id: int, team: str) -> None:
         """Set the winner for a question and update team scores."""
-        self.db.set_question_winner(question_id, team) 
\ No newline at end of file
+        self.db.set_question_winner(question_id, team)
+        self._publish_change((question_id,))
\ No newline at end of file
@@ -0,0 +1,65 @@
+from typing import Callable, Dict, Iterable, List, Optional, Protocol
+
+from database import DEFAULT_EVENT, Database
+from memory_database import FLUSH_INTERVAL_SECONDS, MemoryDatabase
+
+# Storage engines StateManager can run on
+STORAGE_SQLITE = "sqlite"  # Every write committed to the SQLite file (Database)
+STORAGE_MEMORY = "memory"  # Held in memory, flushed to the SQLite file on an interval (MemoryDatabase)
+STORAGE_ENGINES = [STORAGE_SQLITE, STORAGE_MEMORY]
+
+class StorageBackend(Protocol):
+    """
+    What StateManager and its helper threads (vote writer, tally reconciler, backup
+    scheduler) need from a storage engine. Database is the reference implementation;
+    see its docstrings for the exact behaviour of each method.
+    """
+
+    db_file: str
+    event: str
+
+    def get_revision(self) -> int: ...
+    def get_state(self, sections: Optional[Iterable[str]] = None, questions_limit: Optional[int] = None,
+                  questions_after: Optional[int] = None, past_limit: Optional[int] = None,
+                  past_before: Optional[int] = None, include_votes: bool = True) -> Dict: ...
+    def get_state_if_changed(self, last_revision: Optional[int], **options) -> Optional[Dict]: ...
+    def get_vote_series(self, question_id: int, max_points: int = ...) -> Dict: ...
+    def has_voted(self, question_id: int, attendee_id: str) -> tuple[bool, str | None]: ...
+    def get_attendee_votes(self, attendee_id: str) -> Dict[int, str]: ...
+    def list_events(self) -> List[str]: ...
+
+    def add_question(self, text: str, author: str) -> int: ...
+    def set_active_question(self, question_id: Optional[int]) -> None: ...
+    def vote(self, question_id: int, team: str, attendee_id: str) -> bool: ...
+    def vote_batch(self, votes: List[tuple[int, str, str]]) -> List[str]: ...
+    def remove_question(self, question_id: int) -> None: ...
+    def reset_votes(self) -> None: ...
+    def reset_questions(self) -> None: ...
+    def add_votes(self, question_id: int, team: str, amount: int) -> None: ...
+    def subtract_votes(self, question_id: int, team: str, amount: int) -> None: ...
+    def import_questions(self, questions: Iterable[Dict], mode: str = ...,
+                         batch_size: int = ..., progress: Optional[Callable[[int], None]] = None) -> int: ...
+    def toggle_scores_blur(self) -> bool: ...
+    def set_question_winner(self, question_id: int, team: str) -> None: ...
+
+    def reconcile_tallies(self, after_question_id: int = 0, limit: int = ...) -> Dict: ...
+    def backup(self, dest_path: str, pages_per_step: int = ..., pause_seconds: float = ...) -> str: ...
+    def restore(self, snapshot_path: str) -> None: ...
+    def close(self) -> None: ...
+
+def open_storage(storage: str = STORAGE_SQLITE, db_file: str = "panel_showdown.db", event: str = DEFAULT_EVENT,
+                 flush_interval: float | None = FLUSH_INTERVAL_SECONDS) -> StorageBackend:
+    """
+    Open a storage engine on a database file.
+
+    Args:
+        storage: One of STORAGE_ENGINES
+        db_file: Path to the SQLite database file
+        event: The event to work on
+        flush_interval: How often the memory engine writes to db_file (ignored by SQLite)
+    """
+    if storage == STORAGE_SQLITE:
+        return Database(db_file, event=event)
+    if storage == STORAGE_MEMORY:
+        return MemoryDatabase(db_file, event=event, flush_interval=flush_interval)
+    raise ValueError(f"Storage must be one of {', '.join(STORAGE_ENGINES)}")
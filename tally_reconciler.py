@@ -0,0 +1,48 @@
+import threading
+from typing import Callable, Optional
+
+from storage import StorageBackend
+
+class TallyReconciler:
+    """
+    Background thread that verifies vote tallies and team scores against their
+    ground truth, a slice of questions at a time, and repairs any drift it finds.
+    """
+
+    def __init__(self, db: StorageBackend, interval_seconds: float = 5.0,
+                 on_repair: Optional[Callable[[list], None]] = None):
+        """
+        Args:
+            db: StorageBackend to verify
+            interval_seconds: Pause between slices
+            on_repair: Called with the list of repairs whenever a slice fixed something
+        """
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.on_repair = on_repair
+        self._next_question_id = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tally-reconciler", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> dict:
+        """Verify the next slice of questions, wrapping around after the last one."""
+        result = self.db.reconcile_tallies(self._next_question_id)
+        self._next_question_id = result["next_question_id"] or 0
+        if result["repaired"]:
+            print(f"Repaired vote tallies: {result['repaired']}")
+            if self.on_repair:
+                self.on_repair(result["repaired"])
+        return result
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the reconciler thread."""
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error reconciling vote tallies: {e}")
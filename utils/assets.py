@@ -0,0 +1,83 @@
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Hashable
+
+from PIL import Image, ImageOps
+
+# Generated assets are written under the app's `static` directory, which Streamlit
+# serves at app/static/ when server.enableStaticServing is on (see .streamlit/config.toml)
+APP_ROOT = Path(__file__).resolve().parent.parent
+ASSET_DIR = APP_ROOT / "static" / "assets"
+ASSET_URL_PREFIX = "app/static/assets"
+
+THUMBNAIL_SIZE = 80  # Panelist images are shown at 80x80px
+THUMBNAIL_QUALITY = 85
+
+_asset_urls: dict = {}  # cache key -> static URL of the generated asset
+_asset_lock = threading.Lock()
+
+def get_static_asset_url(cache_key: Hashable, build: Callable[[], bytes], name: str, extension: str) -> str:
+    """
+    Get the static URL for a generated asset, building it only the first time.
+
+    The file name includes a hash of its content, so browsers can cache it
+    indefinitely and a changed asset always gets a new URL.
+
+    Args:
+        cache_key: Identifies the asset's inputs (include an mtime for file-based assets)
+        build: Produces the asset's bytes when it isn't cached yet
+        name: Human-readable file name prefix
+        extension: File extension including the dot, e.g. ".png"
+    """
+    with _asset_lock:
+        url = _asset_urls.get(cache_key)
+        if url is not None:
+            return url
+
+        data = build()
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        file_name = f"{name}-{digest}{extension}"
+        path = ASSET_DIR / file_name
+        if not path.exists():
+            ASSET_DIR.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so a browser never gets a half-written asset
+            tmp_path = path.with_suffix(extension + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+        url = f"{ASSET_URL_PREFIX}/{file_name}"
+        _asset_urls[cache_key] = url
+        return url
+
+def build_thumbnail(image_path: Path, size: int = THUMBNAIL_SIZE) -> bytes:
+    """Crop and resize an image to a square JPEG thumbnail."""
+    with Image.open(image_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            # Flatten transparency onto white, since JPEG has no alpha channel
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        thumbnail = ImageOps.fit(img.convert("RGB"), (size, size), Image.LANCZOS)
+
+    buffered = io.BytesIO()
+    thumbnail.save(buffered, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    return buffered.getvalue()
+
+def get_thumbnail_url(image_path: str, size: int = THUMBNAIL_SIZE) -> str:
+    """
+    Get the static URL of a square thumbnail for an image file.
+    Thumbnails are rebuilt only when the source file's mtime changes.
+    """
+    abs_path = Path(os.path.abspath(image_path))
+    mtime = abs_path.stat().st_mtime_ns
+    return get_static_asset_url(
+        ("thumbnail", str(abs_path), mtime, size),
+        lambda: build_thumbnail(abs_path, size),
+        abs_path.stem,
+        ".jpg"
+    )
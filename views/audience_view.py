@@ -1,64 +1,136 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from state_manager import StateManager
-from datetime import datetime, timedelta
+from database import format_display_time
+from functools import lru_cache
 import time
 import uuid
 
+PAST_QUESTIONS_PAGE_SIZE = 10  # Past questions shown per page in the audience view
+QUESTION_CARD_CACHE_SIZE = 1024  # Rendered question cards kept, shared by every session
+
 def get_attendee_id():
     """Get or create a unique attendee ID for this session."""
     if "attendee_id" not in st.session_state:
         st.session_state.attendee_id = str(uuid.uuid4())
     return st.session_state.attendee_id
 
-def render_question_card(question, is_active=False, is_past=False, has_voted=False, voted_team=None):
+def live_state_key(state_manager: StateManager, cache_key: str) -> str:
+    """Session state key for a cached state, so revisions of different events never get compared."""
+    return f"{state_manager.event}/{cache_key}"
+
+def get_live_state(state_manager: StateManager, cache_key: str = "live_state", **options) -> dict:
+    """
+    Get the current state, reusing this session's last copy when the revision hasn't moved.
+    Polling views call this on every refresh, so unchanged refreshes cost a single revision lookup.
+    Options (sections, limits, cursors) are passed to get_state; use a separate cache_key per set of options.
+    """
+    session_key = live_state_key(state_manager, cache_key)
+    cached_state = st.session_state.get(session_key)
+    last_revision = cached_state["revision"] if cached_state else None
+    state = state_manager.get_state_if_changed(last_revision, **options)
+    if state is None:
+        return cached_state
+    st.session_state[session_key] = state
+    return state
+
+def get_live_attendee_votes(state_manager: StateManager, attendee_id: str, revision: int) -> dict:
+    """
+    Get this attendee's votes ({question_id: team}), reusing this session's last copy while the
+    state revision hasn't moved. Every vote moves the revision, and cast_vote drops the copy, so it
+    is re-read only when something may have changed.
+    """
+    session_key = live_state_key(state_manager, "attendee_votes")
+    cached = st.session_state.get(session_key)
+    if cached is None or cached["revision"] != revision:
+        cached = {"revision": revision, "votes": state_manager.get_attendee_votes(attendee_id)}
+        st.session_state[session_key] = cached
+    return cached["votes"]
+
+def cast_vote(state_manager: StateManager, question_id: int, team: str, attendee_id: str):
+    """Record this attendee's vote, report the result and make the next refresh re-read their votes."""
+    if state_manager.vote(question_id, team, attendee_id):
+        st.success("Vote recorded!")
+    else:
+        st.error("You have already voted for this question!")
+    st.session_state.pop(live_state_key(state_manager, "attendee_votes"), None)
+
+def render_question_card(question, is_active=False, is_past=False, has_voted=False, voted_team=None, attendee_votes=None):
+    # Look up the vote in the attendee's bulk vote map when one is provided
+    if attendee_votes is not None:
+        voted_team = attendee_votes.get(question["id"])
+        has_voted = voted_team is not None
+    
+    # Cards only change when their votes or winner do, so identical cards are rendered once
+    st.markdown(question_card_html(
+        question["id"],
+        question["text"],
+        question["author"],
+        question.get("display_time") or format_timestamp(question["timestamp"]),
+        question["votes"]["bc"],
+        question["votes"]["fo"],
+        question.get("winner"),
+        is_active,
+        is_past
+    ), unsafe_allow_html=True)
+
+    if has_voted:
+        st.markdown(vote_status_html(voted_team), unsafe_allow_html=True)
+
+@lru_cache(maxsize=QUESTION_CARD_CACHE_SIZE)
+def question_card_html(question_id, text, author, display_time, bc_votes, fo_votes, winner, is_active, is_past) -> str:
+    """Build the HTML for a question card. question_id is only part of the cache key."""
     card_class = "question-card active-question" if is_active else "question-card"
     if is_past:
         card_class += " past-question"
     
-    if question.get("winner") == "bc":
+    if winner == "bc":
         team_color = "#0066cc"
-    elif question.get("winner") == "fo":
+    elif winner == "fo":
         team_color = "#cc0000"
     else:
         team_color = "#888888"  # Gray color for no winner or other cases
     
-    winner = question.get('winner', '').upper() if question.get('winner') else "none"
+    winner = winner.upper() if winner else "none"
     
-    st.markdown(f"""
+    return f"""
         <div class="{card_class}">
-            <div class="question-text"><strong>Q:</strong> {question['text']}</div>
+            <div class="question-text"><strong>Q:</strong> {text}</div>
             <div class="question-meta">
-                By: {question['author']} at {format_timestamp(question['timestamp'])}<br>
-                Votes: BC ({question['votes']['bc']}) | FO ({question['votes']['fo']})
+                By: {author} at {display_time}<br>
+                Votes: BC ({bc_votes}) | FO ({fo_votes})
             </div>
             <div class="winner-info" style="color:{team_color}">
                 <strong>Point awarded to {winner}</strong>
             </div>
         </div>
-    """, unsafe_allow_html=True)
-
+    """
 
-    if has_voted:
-        team_color = "#0066cc" if voted_team == "bc" else "#cc0000"
-        vote_status = f"""
+@lru_cache(maxsize=None)
+def vote_status_html(voted_team) -> str:
+    """Build the "Voted for" badge shown under a card."""
+    team_color = "#0066cc" if voted_team == "bc" else "#cc0000"
+    return f"""
             <div style='width:100%; text-align:center;'>
                 <div style='margin-top:0.5rem; padding:0.3rem; background:{team_color}; color:white; border-radius:0.3rem; display:inline-block;'>
                     Voted for {voted_team.upper()}
                 </div>
             </div>
         """
-        st.markdown(vote_status, unsafe_allow_html=True)
 
 def format_timestamp(timestamp):
-    dt = datetime.fromisoformat(timestamp)
-    return dt.strftime("%H:%M:%S")
+    return format_display_time(timestamp)
 
-def show_audience_view(state_manager: StateManager):
-    st.title("🎯 Panel Showdown")
+def show_audience_view(state_manager: StateManager, live_refresh_seconds: float | None = None):
+    """
+    Render the audience view.
     
-    # Get state
-    state = state_manager.get_state()
-    attendee_id = get_attendee_id()
+    Args:
+        state_manager: Shared state manager
+        live_refresh_seconds: If set, only the live questions section refreshes on this interval
+            (as a fragment) while the title and question form are left alone
+    """
+    st.title("🎯 Panel Showdown")
     
     # Handle success message
     if "show_submit_success" in st.session_state and st.session_state.show_submit_success:
@@ -77,32 +149,58 @@ def show_audience_view(state_manager: StateManager):
             st.session_state.show_submit_success = True  # Set flag to show success message
             st.rerun()  # Rerun to get fresh state with new question
     
+    # Live section: the only part that changes between refreshes
+    if live_refresh_seconds:
+        st.fragment(show_live_questions, run_every=live_refresh_seconds)(state_manager, partial=True)
+    else:
+        show_live_questions(state_manager)
+
+def rerun_live_section(partial: bool):
+    """Rerun only the live fragment when partial refresh is on, otherwise the whole app."""
+    if partial:
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            pass  # The fragment is running as part of a full-app run, so rerun the app instead
+    st.rerun()
+
+def show_live_questions(state_manager: StateManager, partial: bool = False):
+    """Render the active and past questions with this attendee's voting buttons."""
+    # Get only the active question and a page of past questions
+    # (skips the read entirely when nothing changed since the last refresh)
+    past_limit = st.session_state.get("past_questions_shown", PAST_QUESTIONS_PAGE_SIZE)
+    state = get_live_state(
+        state_manager,
+        f"audience_state_{past_limit}",
+        sections=["active_question", "past_questions"],
+        past_limit=past_limit
+    )
+    attendee_id = get_attendee_id()
+    
+    # All of this attendee's votes in one query, and only when the revision moved
+    attendee_votes = get_live_attendee_votes(state_manager, attendee_id, state["revision"])
+    
     # Active question display
     st.subheader("Current Question")
     
     if state["active_question"] is not None:
-        active_q = next((q for q in state["questions"] if q["id"] == state["active_question"]), None)
+        active_q = state["active"]
         if active_q:
-            has_voted, voted_team = state_manager.has_voted(active_q["id"], attendee_id)
-            render_question_card(active_q, True, has_voted=has_voted, voted_team=voted_team)
+            voted_team = attendee_votes.get(active_q["id"])
+            has_voted = voted_team is not None
+            render_question_card(active_q, True, attendee_votes=attendee_votes)
             
             # Only show voting buttons if question is not locked and user hasn't voted
             if not active_q.get("winner") and not has_voted:
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("Vote Business Central", key="vote_bc_active"):
-                        if state_manager.vote(active_q["id"], "bc", attendee_id):
-                            st.success("Vote recorded!")
-                        else:
-                            st.error("You have already voted for this question!")
-                        st.rerun()
+                        cast_vote(state_manager, active_q["id"], "bc", attendee_id)
+                        rerun_live_section(partial)
                 with col2:
                     if st.button("Vote Finance & Operations", key="vote_fo_active"):
-                        if state_manager.vote(active_q["id"], "fo", attendee_id):
-                            st.success("Vote recorded!")
-                        else:
-                            st.error("You have already voted for this question!")
-                        st.rerun()
+                        cast_vote(state_manager, active_q["id"], "fo", attendee_id)
+                        rerun_live_section(partial)
             elif has_voted:
                 st.info(f"You have already voted for {voted_team.upper()}")
             elif active_q.get("winner"):
@@ -113,37 +211,44 @@ def show_audience_view(state_manager: StateManager):
     # Past questions display
     if state["past_questions"]:
         st.subheader("Past Questions")
-        for past_q in reversed(state["past_questions"]):  # Show most recent first
-            has_voted, voted_team = state_manager.has_voted(past_q["id"], attendee_id)
-            render_question_card(past_q, is_past=True, has_voted=has_voted, voted_team=voted_team)
+        for past_q in state["past_questions"]:  # Most recent first
+            voted_team = attendee_votes.get(past_q["id"])
+            has_voted = voted_team is not None
+            render_question_card(past_q, is_past=True, attendee_votes=attendee_votes)
             
             # Only show voting buttons if question is not locked and user hasn't voted
             if not past_q.get("winner") and not has_voted:
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("Vote BC", key=f"vote_bc_past_{past_q['id']}"):
-                        if state_manager.vote(past_q["id"], "bc", attendee_id):
-                            st.success("Vote recorded!")
-                        else:
-                            st.error("You have already voted for this question!")
-                        st.rerun()
+                        cast_vote(state_manager, past_q["id"], "bc", attendee_id)
+                        rerun_live_section(partial)
                 with col2:
                     if st.button("Vote FO", key=f"vote_fo_past_{past_q['id']}"):
-                        if state_manager.vote(past_q["id"], "fo", attendee_id):
-                            st.success("Vote recorded!")
-                        else:
-                            st.error("You have already voted for this question!")
-                        st.rerun()
+                        cast_vote(state_manager, past_q["id"], "fo", attendee_id)
+                        rerun_live_section(partial)
             elif has_voted:
                 st.info(f"You have already voted for {voted_team.upper()}")
             elif past_q.get("winner"):
                 st.info(f"Voting is closed. Point awarded to {past_q['winner'].upper()}")
             st.markdown("---")  # Add a separator between past questions
+        
+        # Older past questions are loaded a page at a time
+        if state["cursors"]["past_questions"] is not None:
+            if st.button("Show older questions", key="show_older_questions"):
+                st.session_state.past_questions_shown = past_limit + PAST_QUESTIONS_PAGE_SIZE
+                rerun_live_section(partial)
 
-def run_auto_refreshing_audience_view(state_manager: StateManager, interval_seconds: int = 2):
+def run_auto_refreshing_audience_view(state_manager: StateManager, interval_seconds: int = 2, partial_refresh: bool = True):
     """
-    Renders the audience view and then schedules the script to rerun after a specified interval.
+    Renders the audience view and keeps it current.
+    With partial_refresh, only the live questions section reruns every interval_seconds.
+    Otherwise the script sleeps and then reruns the whole app.
     """
+    if partial_refresh:
+        show_audience_view(state_manager, live_refresh_seconds=interval_seconds)
+        return
+    
     show_audience_view(state_manager)  # Render the UI
     
     # Wait for the specified interval
@@ -1,16 +1,34 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from state_manager import StateManager
+from database import DEFAULT_EVENT
+from urllib.parse import urlencode
 import json
 import os
 from datetime import datetime, timedelta
 import time
 from utils.image_utils import get_image_as_base64
-from .audience_view import render_question_card  # Import the shared card renderer
+from utils.assets import get_static_asset_url, get_thumbnail_url
+from .audience_view import render_question_card, get_live_state, live_state_key  # Import the shared helpers
 import qrcode
 import io
-import base64
 
-def generate_qr_code(url):
+PANELISTS_FILE = "panelists.json"
+AUDIENCE_URL = "https://dynamicsminds25.streamlit.app/"
+
+# Live sections block waiting for a change instead of polling. A fragment auto-rerun that comes
+# due while one is still waiting is queued rather than interrupting it, so a short run_every
+# keeps a section continuously waiting; the wait timeout bounds how long a run can block.
+LONG_POLL_RERUN_SECONDS = 0.25
+LONG_POLL_TIMEOUT_SECONDS = 10
+
+MOMENTUM_CHART_HEIGHT = 60  # SVG user units; the chart stretches to the width of the progress bar
+MOMENTUM_MIN_POINTS = 2  # A line needs two points
+
+_panelists_cache = {}  # Last parsed panelists file, keyed on its mtime
+
+def generate_qr_code(url) -> bytes:
+    """Generate a QR code for the URL as PNG bytes."""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -21,19 +39,40 @@ def generate_qr_code(url):
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
     
-    # Convert to base64 for HTML display
     buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+    img.save(buffered, format="PNG", optimize=True)
+    return buffered.getvalue()
+
+def get_audience_url(event: str) -> str:
+    """Audience view URL for an event."""
+    if event == DEFAULT_EVENT:
+        return AUDIENCE_URL
+    return f"{AUDIENCE_URL}?{urlencode({'event': event})}"
+
+def get_qr_code_url(url) -> str:
+    """Get the static URL of the QR code for the URL, generating it only once."""
+    return get_static_asset_url(("qr", url), lambda: generate_qr_code(url), "qr", ".png")
 
 def load_panelists():
-    with open("panelists.json", "r") as f:
-        panelists = json.load(f)
-        # Convert image paths to base64
-        for panelist in panelists:
-            panelist["image"] = get_image_as_base64(panelist["image"])
-        return panelists
+    """Load panelists with thumbnail URLs, rereading the file only when it changes."""
+    mtime = os.path.getmtime(PANELISTS_FILE)
+    if _panelists_cache.get("mtime") != mtime:
+        with open(PANELISTS_FILE, "r") as f:
+            _panelists_cache["panelists"] = json.load(f)
+        _panelists_cache["mtime"] = mtime
+    
+    # Resolved on every load, so a replaced image gets a new thumbnail without touching the JSON.
+    # get_thumbnail_url keys on each image's mtime, so this is only a stat per image once cached.
+    panelists = []
+    for panelist in _panelists_cache["panelists"]:
+        panelist = dict(panelist)
+        try:
+            panelist["image"] = get_thumbnail_url(panelist["image"])
+        except Exception as e:
+            print(f"Error building thumbnail: {e}")
+            panelist["image"] = get_image_as_base64(panelist["image"])  # Falls back to a placeholder
+        panelists.append(panelist)
+    return panelists
 
 def render_panelist_card(panelist):
     team_colors = {
@@ -51,12 +90,23 @@ def render_panelist_card(panelist):
         </div>
     """, unsafe_allow_html=True)
 
-def show_display_view(state_manager: StateManager):
+def show_display_view(state_manager: StateManager, live_refresh_seconds: float | None = None,
+                      long_poll: bool = False):
+    """
+    Render the display view.
+    
+    Args:
+        state_manager: Shared state manager
+        live_refresh_seconds: If set, only the live sections (active question, voting progress,
+            scores and past questions) refresh on this interval, as fragments
+        long_poll: Instead of refreshing on a timer, have the live fragments wait for the
+            next change and redraw as soon as it happens
+    """
     # Add QR code in top-right corner
-    qr_code = generate_qr_code("https://dynamicsminds25.streamlit.app/")
+    qr_code_url = get_qr_code_url(get_audience_url(state_manager.event))
     st.markdown(f"""
         <div style='position:absolute; top:0.5rem; right:1rem; background:white; padding:0.3rem; border-radius:0.5rem; box-shadow:0 2px 4px rgba(0,0,0,0.1);'>
-            <img src='data:image/png;base64,{qr_code}' style='width:80px; height:80px;'>
+            <img src='{qr_code_url}' style='width:80px; height:80px;'>
             <div style='font-size:0.7rem; color:#666; text-align:center; margin-top:0.1rem;'>Scan to join</div>
         </div>
     """, unsafe_allow_html=True)
@@ -68,12 +118,63 @@ def show_display_view(state_manager: StateManager):
         </h1>
     """, unsafe_allow_html=True)
     
-    # Get current state
-    state = state_manager.get_state()
+    # --- Current Question and Scores ---
+    show_live_section(show_live_scoreboard, state_manager, live_refresh_seconds, long_poll)
+
+    # --- Panelists ---
+    st.markdown("<h2 style='text-align:center; margin:1rem 0 0.5rem 0; font-size:1.4rem;'>Panelists</h2>", unsafe_allow_html=True)
+    panelists = load_panelists()
+    bc_panelists = [p for p in panelists if p["team"] == "bc"]
+    fo_panelists = [p for p in panelists if p["team"] == "fo"]
+    moderator = [p for p in panelists if p["team"] == "moderator"]
+
+    # Arrange: (empty) | BC1 | BC2 | MOD | FO1 | FO2 | (empty)
+    panelist_row = [None] + bc_panelists + moderator + fo_panelists + [None]
+    cols = st.columns(7)
+    for i, p in enumerate(panelist_row):
+        with cols[i]:
+            if p:
+                render_panelist_card(p)
+
+    # --- Past Questions ---
+    show_live_section(show_live_past_questions, state_manager, live_refresh_seconds, long_poll)
+
+def show_live_section(render, state_manager: StateManager, live_refresh_seconds: float | None,
+                      long_poll: bool = False):
+    """Render a live section, as a self-refreshing fragment when live_refresh_seconds is set."""
+    if live_refresh_seconds and long_poll:
+        st.fragment(render, run_every=LONG_POLL_RERUN_SECONDS)(state_manager, LONG_POLL_TIMEOUT_SECONDS)
+    elif live_refresh_seconds:
+        st.fragment(render, run_every=live_refresh_seconds)(state_manager)
+    else:
+        render(state_manager)
+
+def wait_for_live_change(state_manager: StateManager, cache_key: str, timeout: float | None) -> None:
+    """
+    Block a fragment rerun until the state moves past this session's copy under cache_key.
+    Full runs never wait, so the rest of the page isn't held up.
+    """
+    if not timeout:
+        return
+    cached_state = st.session_state.get(live_state_key(state_manager, cache_key))
+    ctx = get_script_run_ctx()
+    if cached_state is None or ctx is None or not ctx.fragment_ids_this_run:
+        return
+    state_manager.wait_for_change(cached_state["revision"], timeout)
+
+def show_live_scoreboard(state_manager: StateManager, wait_seconds: float | None = None):
+    """Render the active question, its voting progress and the team scores."""
+    wait_for_live_change(state_manager, "display_scoreboard_state", wait_seconds)
+    # Get only what this section draws (skips the read entirely when nothing changed since the last refresh)
+    state = get_live_state(
+        state_manager,
+        "display_scoreboard_state",
+        sections=["active_question", "votes", "display_settings"]
+    )
     
     # --- Current Question ---
     if state["active_question"] is not None:
-        active_q = next((q for q in state["questions"] if q["id"] == state["active_question"]), None)
+        active_q = state["active"]
         if active_q:
             st.markdown(f"""
                 <div style='background:#fff; border:2px solid #0066cc; border-radius:0.5rem; padding:1rem; margin:0.5rem auto; max-width:900px; text-align:center; font-size:1.8rem; font-weight:bold; color:#111;'>
@@ -106,6 +207,9 @@ def show_display_view(state_manager: StateManager):
                         </div>
                     </div>
                 """, unsafe_allow_html=True)
+
+                # Read from pre-aggregated per-second buckets, and cached until the next change
+                render_vote_momentum(state_manager.get_vote_series(active_q["id"]))
         else:
             st.info("No active question selected.")
     else:
@@ -127,33 +231,59 @@ def show_display_view(state_manager: StateManager):
             </div>
         """, unsafe_allow_html=True)
 
-    # --- Panelists ---
-    st.markdown("<h2 style='text-align:center; margin:1rem 0 0.5rem 0; font-size:1.4rem;'>Panelists</h2>", unsafe_allow_html=True)
-    panelists = load_panelists()
-    bc_panelists = [p for p in panelists if p["team"] == "bc"]
-    fo_panelists = [p for p in panelists if p["team"] == "fo"]
-    moderator = [p for p in panelists if p["team"] == "moderator"]
+def momentum_points(counts: list[int], peak: int) -> str:
+    """SVG polyline points for per-bucket vote counts, one unit of width per bucket."""
+    height = MOMENTUM_CHART_HEIGHT
+    return " ".join(f"{x},{height - count * height / peak:.1f}" for x, count in enumerate(counts))
 
-    # Arrange: (empty) | BC1 | BC2 | MOD | FO1 | FO2 | (empty)
-    panelist_row = [None] + bc_panelists + moderator + fo_panelists + [None]
-    cols = st.columns(7)
-    for i, p in enumerate(panelist_row):
-        with cols[i]:
-            if p:
-                render_panelist_card(p)
+def render_vote_momentum(series: dict):
+    """Render how fast each team's votes came in on the active question, as a small line chart."""
+    if len(series["bc"]) < MOMENTUM_MIN_POINTS:
+        return  # Every vote so far arrived in one bucket; nothing to plot yet
+    peak = max(max(series["bc"]), max(series["fo"]), 1)
+    width = len(series["bc"]) - 1
+    unit = "second" if series["bucket_seconds"] == 1 else f"{series['bucket_seconds']} seconds"
+    st.markdown(f"""
+        <div style='margin:0.5rem auto; max-width:900px;'>
+            <div style='font-size:1rem; font-weight:bold; text-align:center; margin-bottom:0.3rem;'>
+                Voting Momentum <span style='font-weight:normal; font-size:0.8rem; color:#666;'>(votes per {unit}, peak {peak})</span>
+            </div>
+            <svg viewBox='0 0 {width} {MOMENTUM_CHART_HEIGHT}' preserveAspectRatio='none' style='width:100%; height:80px; background:#fafafa; border-radius:0.5rem;'>
+                <polyline points='{momentum_points(series["bc"], peak)}' fill='none' stroke='#0066cc' stroke-width='3' vector-effect='non-scaling-stroke'/>
+                <polyline points='{momentum_points(series["fo"], peak)}' fill='none' stroke='#cc0000' stroke-width='3' vector-effect='non-scaling-stroke'/>
+            </svg>
+        </div>
+    """, unsafe_allow_html=True)
 
-    # --- Past Questions ---
+def show_live_past_questions(state_manager: StateManager, wait_seconds: float | None = None):
+    """Render the most recent past questions."""
+    wait_for_live_change(state_manager, "display_past_questions_state", wait_seconds)
+    state = get_live_state(
+        state_manager,
+        "display_past_questions_state",
+        sections=["past_questions"],
+        past_limit=3
+    )
+    
     if state["past_questions"]:
         st.markdown("<h2 style='text-align:center; margin:1rem 0 0.5rem 0; font-size:1.4rem;'>Past Questions</h2>", unsafe_allow_html=True)
-        for past_q in reversed(state["past_questions"][-3:]):  # Show last 3 past questions
+        for past_q in state["past_questions"]:  # Last 3 past questions, most recent first
             render_question_card(past_q, is_past=True)
             st.markdown("<hr style='margin:0.5rem 0;'>")  # Thinner separator
 
-def run_auto_refreshing_display_view(state_manager: StateManager, interval_seconds: int = 2):
+def run_auto_refreshing_display_view(state_manager: StateManager, interval_seconds: int = 2, partial_refresh: bool = True,
+                                     long_poll: bool = True):
     """
-    Renders the display view and then schedules the script to rerun after a specified interval.
+    Renders the display view and keeps it current.
+    With partial_refresh, only the live sections rerun: as soon as the state changes when
+    long_poll is set, otherwise every interval_seconds.
+    Otherwise the script sleeps and then reruns the whole app.
     This function should be called at the top level of your Streamlit script.
     """
+    if partial_refresh:
+        show_display_view(state_manager, live_refresh_seconds=interval_seconds, long_poll=long_poll)
+        return
+    
     show_display_view(state_manager)  # Render the UI
     
     # Wait for the specified interval
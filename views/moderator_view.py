@@ -1,5 +1,7 @@
 import streamlit as st
+import metrics
 from state_manager import StateManager
+from database import DEFAULT_EVENT
 from datetime import datetime
 from .audience_view import render_question_card, format_timestamp
 import json
@@ -26,8 +28,19 @@ def confirm_action(action_key: str, action_name: str, on_confirm):
             st.session_state[f'confirm_{action_key}'] = False  # Reset the confirmation state
             st.rerun()
 
+def load_question_bank(state_manager: StateManager, path: str):
+    """Import a question bank, showing a running count while it streams in."""
+    status = st.empty()
+    imported = state_manager.load_initial_questions(
+        path,
+        progress=lambda count: status.info(f"Imported {count} questions...")
+    )
+    status.success(f"Imported {imported} questions")
+
 def show_moderator_view(state_manager: StateManager):
     st.title("🎯 Panel Showdown - Moderator View")
+    if state_manager.event != DEFAULT_EVENT:
+        st.caption(f"Event: {state_manager.event}")
     
     # Get state
     state = state_manager.get_state()
@@ -45,7 +58,7 @@ def show_moderator_view(state_manager: StateManager):
         confirm_action(
             "load_initial",
             "Load Initial Questions",
-            lambda: state_manager.load_initial_questions("data/initial_questions.json")
+            lambda: load_question_bank(state_manager, "data/initial_questions.json")
         )
     with col3:
         confirm_action(
@@ -139,4 +152,12 @@ def show_moderator_view(state_manager: StateManager):
             if st.button("Make Active", key=f"reactivate_{past_q['id']}"):
                 state_manager.set_active_question(past_q["id"])
                 st.rerun()
-            st.markdown("---") 
\ No newline at end of file
+            st.markdown("---")
+    
+    # Timings for this server process, only when instrumentation is enabled
+    if metrics.is_enabled():
+        with st.expander("🛠 Debug: operation timings"):
+            st.dataframe(metrics.summary(), use_container_width=True, hide_index=True)
+            if st.button("Reset timings"):
+                metrics.reset()
+                st.rerun() 
\ No newline at end of file
@@ -0,0 +1,82 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from storage import StorageBackend
+
+_STOP = object()  # Sentinel that tells the writer thread to finish
+
+class VoteWriter:
+    """
+    Single writer thread that applies queued votes in batched transactions.
+
+    While one batch is being committed, new votes pile up in the queue and are
+    written together in the next transaction, so a burst of votes costs a few
+    commits instead of one commit per vote.
+    """
+
+    def __init__(self, db: StorageBackend, max_batch_size: int = 500):
+        self.db = db
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="vote-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, question_id: int, team: str, attendee_id: str) -> Future:
+        """
+        Queue a vote. The returned future resolves to VOTE_RECORDED,
+        VOTE_ALREADY_VOTED or VOTE_LOCKED once the vote's batch is committed.
+        """
+        if team not in ["bc", "fo"]:
+            raise ValueError("Team must be 'bc' or 'fo'")
+        if self._stopped:
+            raise RuntimeError("Vote writer has been stopped")
+
+        future = Future()
+        self._queue.put((question_id, team, attendee_id, future))
+        return future
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Apply the votes already queued, then stop the writer thread."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        """Writer loop: wait for a vote, drain whatever else is queued, apply it all at once."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._apply_batch(batch)
+
+    def _apply_batch(self, batch: list) -> None:
+        """Write one batch and resolve each caller's future with its own result."""
+        try:
+            results = self.db.vote_batch([
+                (question_id, team, attendee_id) for question_id, team, attendee_id, _ in batch
+            ])
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        for (*_, future), result in zip(batch, results):
+            future.set_result(result)